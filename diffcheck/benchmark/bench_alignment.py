@@ -0,0 +1,54 @@
+"""
+map_spacy_to_deberta against the old nested scan it replaced, which is only run up to 10k
+tokens since it grows quadratically.
+
+PYTHONPATH=src python benchmark/bench_alignment.py
+"""
+import random
+from collections import namedtuple
+
+from documents import timed
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+
+
+FakeToken = namedtuple('FakeToken', ['idx', 'text'])
+
+
+def nested_spacy_to_deberta(spacy_tokens, deberta_offsets) -> list[list]:
+    token_mapping = [[] for _ in range(len(spacy_tokens))]
+    for deberta_offset in deberta_offsets:
+        for i, token in enumerate(spacy_tokens):
+            if token.idx < deberta_offset[1] and token.idx + len(token.text) > deberta_offset[0]:
+                token_mapping[i].append(deberta_offset)
+                break
+    return token_mapping
+
+
+def streams(size: int, seed: int = 0) -> tuple[list[FakeToken], list[tuple[int, int, str]]]:
+    """size words of one to ten characters, every word split into one or two sub-tokens"""
+    generator = random.Random(seed)
+    spacy_tokens = []
+    deberta_offsets = []
+    position = 0
+    for _ in range(size):
+        length = generator.randint(1, 10)
+        spacy_tokens.append(FakeToken(position, 'x' * length))
+        split = generator.randint(1, length)
+        deberta_offsets.append(tuple((position, position + split, 'x')))
+        if split < length:
+            deberta_offsets.append(tuple((position + split, position + length, 'x')))
+        position += length + 1
+
+    return spacy_tokens, deberta_offsets
+
+
+def main():
+    print(f'{"tokens":>8}{"nested s":>12}{"linear s":>12}')
+    for size in (1000, 10000, 100000):
+        spacy_tokens, deberta_offsets = streams(size)
+        nested = f'{timed(nested_spacy_to_deberta, spacy_tokens, deberta_offsets, repeat=1):>12.4f}' if size <= 10000 else f'{"-":>12}'
+        print(f'{size:>8}{nested}{timed(ContextAwareTokenizer.map_spacy_to_deberta, spacy_tokens, deberta_offsets):>12.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Moved-block detection on growing documents: exhaustive matchers against the k-gram anchor index.
+
+PYTHONPATH=src python benchmark/bench_anchored.py
+"""
+from documents import moved_block_documents, timed
+from matcher.backends import get_matcher
+
+
+REFERENCE_LIMIT = 5000
+
+
+def main():
+    matchers = {
+        'reference': get_matcher('reference'),
+        'vectorized': get_matcher('vectorized'),
+        'anchored k=4': get_matcher('anchored', k=4, min_length=4),
+        'anchored k=8': get_matcher('anchored', k=8, min_length=8),
+    }
+
+    print(f'{"tokens":>8}' + ''.join(f'{name:>22}' for name in matchers))
+    for blocks in (100, 300, 1000, 3000, 6000):
+        left, right = moved_block_documents(blocks, block_length=(5, 30))
+        row = f'{len(left):>8}'
+        for name, matcher in matchers.items():
+            if name == 'reference' and len(left) > REFERENCE_LIMIT:
+                row += f'{"-":>22}'
+                continue
+
+            spans = matcher(left, right)
+            row += f'{timed(matcher, left, right, repeat=1):>13.3f}s {len(spans):>6}'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
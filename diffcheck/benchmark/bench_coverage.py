@@ -0,0 +1,60 @@
+"""
+Overlap checks and covered token removal: per-token any() scans against the Coverage bitmap.
+
+PYTHONPATH=src python benchmark/bench_coverage.py
+"""
+from documents import moved_block_documents, timed
+from matcher.coverage import Coverage
+from matcher.longest_matches import find_best_matching_spans
+from matcher.suffix_array import find_suffix_array_spans
+
+
+def scan_select(candidates, left_tokens, right_tokens):
+    matching_spans = []
+    for span_left in candidates:
+        if not any(
+            (span_right[0] < span_left[0] + span_left[2] and span_left[0] < span_right[0] + span_right[2])
+            or (span_right[1] < span_left[1] + span_left[2] and span_left[1] < span_right[1] + span_right[2])
+            for span_right in matching_spans
+        ):
+            matching_spans.append(span_left)
+
+    left = [token for i, token in enumerate(left_tokens) if not any(span[0] <= i < span[0] + span[2] for span in matching_spans)]
+    right = [token for i, token in enumerate(right_tokens) if not any(span[1] <= i < span[1] + span[2] for span in matching_spans)]
+
+    return matching_spans, left, right
+
+
+def coverage_select(candidates, left_tokens, right_tokens):
+    matching_spans = []
+    left_coverage = Coverage(len(left_tokens))
+    right_coverage = Coverage(len(right_tokens))
+    for span in candidates:
+        if not left_coverage.overlaps(span[0], span[2]) and not right_coverage.overlaps(span[1], span[2]):
+            matching_spans.append(span)
+            left_coverage.add(span[0], span[2])
+            right_coverage.add(span[1], span[2])
+
+    return matching_spans, left_coverage.uncovered(left_tokens), right_coverage.uncovered(right_tokens)
+
+
+def main():
+    print(f'{"blocks":>8}{"tokens":>8}{"spans":>8}{"any()":>10}{"bitmap":>10}{"best spans":>12}')
+    for blocks in (100, 200, 400, 800):
+        left, right = moved_block_documents(blocks)
+        candidates = find_suffix_array_spans(left, right)
+        candidates.sort(key=lambda match: (match[2], -abs(match[0] - match[1])), reverse=True)
+
+        assert scan_select(candidates, left, right) == coverage_select(candidates, left, right)
+        spans = find_best_matching_spans(left, right, find_suffix_array_spans)
+
+        print(
+            f'{blocks:>8}{len(left):>8}{len(spans):>8}'
+            f'{timed(scan_select, candidates, left, right):>10.4f}'
+            f'{timed(coverage_select, candidates, left, right):>10.4f}'
+            f'{timed(find_best_matching_spans, left, right, find_suffix_array_spans):>12.4f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Wall time and peak traced allocations of get_text_deltas on large revisions. The assembly
+columns replay memoized opcodes and spans so only get_text_deltas' own work is measured,
+from token tuples and from TokenStreams.
+
+PYTHONPATH=src python benchmark/bench_deltas.py
+"""
+import tracemalloc
+
+from documents import moved_block_documents, timed, to_span_tokens
+from matcher.backends import DEFAULT_BACKEND, get_matcher
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, get_diff_engine
+from text_comparator.get_text_diff import get_text_deltas
+from tokenizer.token_stream import TokenStream
+
+
+def memoized(function):
+    results = {}
+
+    def replay(left: list, right: list) -> list:
+        key = tuple((len(left), len(right)))
+        if key not in results:
+            results[key] = function(left, right)
+
+        return list(results[key])
+
+    return replay
+
+
+def peak_allocations(function, *args) -> int:
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def main():
+    print(f'{"tokens":>8}{"total s":>10}{"assembly s":>12}{"assembly peak KiB":>19}{"stream s":>10}')
+    for blocks in (300, 1000, 3000):
+        left, right = moved_block_documents(blocks, edit_rate=0.05)
+        left_tokens = to_span_tokens(left)
+        right_tokens = to_span_tokens(right)
+        left_stream = TokenStream.from_tokens(left_tokens)
+        right_stream = TokenStream.from_tokens(right_tokens)
+
+        matcher = memoized(get_matcher(DEFAULT_BACKEND))
+        diff_engine = memoized(get_diff_engine(DEFAULT_DIFF_ENGINE))
+        get_text_deltas(left_tokens, right_tokens, matcher, diff_engine)
+
+        print(
+            f'{len(left):>8}'
+            f'{timed(get_text_deltas, left_tokens, right_tokens):>10.3f}'
+            f'{timed(get_text_deltas, left_tokens, right_tokens, matcher, diff_engine, repeat=5):>12.4f}'
+            f'{peak_allocations(get_text_deltas, left_tokens, right_tokens, matcher, diff_engine) // 1024:>19}'
+            f'{timed(get_text_deltas, left_stream, right_stream, matcher, diff_engine, repeat=5):>10.4f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
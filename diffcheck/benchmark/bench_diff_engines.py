@@ -0,0 +1,45 @@
+"""
+get_text_dif_spans engines on near-identical and heavily rewritten documents.
+
+PYTHONPATH=src python benchmark/bench_diff_engines.py
+"""
+import random
+
+from documents import timed
+from text_comparator.diff_engines import DIFF_ENGINES
+
+
+def revised(tokens: list[int], edit_rate: float, seed: int = 0, vocabulary: int = 3000) -> list[int]:
+    """Replace, delete or insert a token at edit_rate of the positions"""
+    generator = random.Random(seed)
+    result = []
+    for token in tokens:
+        if generator.random() >= edit_rate:
+            result.append(token)
+            continue
+
+        edit = generator.randrange(3)
+        if edit == 0:
+            result.append(generator.randrange(vocabulary))
+        elif edit == 2:
+            result.extend((token, generator.randrange(vocabulary)))
+
+    return result
+
+
+def main():
+    generator = random.Random(0)
+    for label, edit_rate in (('near-identical (0.5% edits)', 0.005), ('heavily rewritten (50% edits)', 0.5)):
+        print(label)
+        print(f'{"tokens":>8}' + ''.join(f'{engine:>12}' for engine in DIFF_ENGINES))
+        for size in (1000, 5000, 20000, 50000):
+            left = [generator.randrange(3000) for _ in range(size)]
+            right = revised(left, edit_rate)
+            print(f'{size:>8}' + ''.join(
+                f'{timed(engine, left, right, repeat=1):>11.3f}s'
+                for engine in DIFF_ENGINES.values()
+            ))
+
+
+if __name__ == '__main__':
+    main()
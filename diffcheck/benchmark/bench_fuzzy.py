@@ -0,0 +1,26 @@
+"""
+find_fuzzy_pairs on growing numbers of moved blocks, a tenth of each block's tokens edited.
+
+PYTHONPATH=src python benchmark/bench_fuzzy.py
+"""
+import random
+
+from documents import timed
+from matcher.fuzzy import find_fuzzy_pairs
+
+
+def main():
+    generator = random.Random(0)
+    print(f'{"blocks":>8}{"seconds":>10}{"paired":>8}')
+    for blocks in (500, 2000, 8000):
+        left = [[generator.randrange(30000) for _ in range(generator.randint(10, 60))] for _ in range(blocks)]
+        right = [
+            [token if generator.random() >= 0.1 else generator.randrange(30000) for token in block]
+            for block in left
+        ]
+        generator.shuffle(right)
+        print(f'{blocks:>8}{timed(find_fuzzy_pairs, left, right, repeat=1):>10.3f}{len(find_fuzzy_pairs(left, right)):>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Paragraph-granular tokenization against whole-document tokenize on the fixtures: tokens
+the two disagree on, and the time to tokenize a one-word edit with the paragraphs of the
+text before the edit already cached. Needs the spaCy and DeBERTa models.
+
+PYTHONPATH=src python benchmark/bench_paragraph_tokens.py
+"""
+from pathlib import Path
+
+from documents import timed
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+from tokenizer.deberta_tokenizer import DebertaTokenizer
+from tokenizer.spacy_tokenizer import spacy_tokenizer
+from tokenizer.token_cache import TokenCache
+
+
+FIXTURES = Path(__file__).parent.parent / 'src'
+
+
+def edited(text: str) -> str:
+    """text with the middle word of its longest line replaced"""
+    line = max(text.splitlines(), key=len)
+    words = line.split(' ')
+    words[len(words) // 2] = 'replaced'
+
+    return text.replace(line, ' '.join(words), 1)
+
+
+def main():
+    tokenizer = ContextAwareTokenizer(DebertaTokenizer(), spacy_tokenizer())
+    version = tokenizer.version()
+
+    print(f'{"fixture":>14}{"tokens":>8}{"differing":>11}{"document s":>12}{"edit s":>10}')
+    for name in ('original.txt', 'revised.txt', 'original2.txt', 'revised2.txt'):
+        text = (FIXTURES / name).read_text(encoding='utf-8')
+        tokenizer.paragraph_granular = False
+        tokenizer.token_cache = None
+        document_tokens = tokenizer.tokenize(text)
+        document_seconds = timed(tokenizer.tokenize, text)
+
+        tokenizer.paragraph_granular = True
+        paragraph_tokens = tokenizer.tokenize(text)
+        differing = len(set(document_tokens).symmetric_difference(paragraph_tokens))
+
+        tokenizer.token_cache = TokenCache(version)
+        tokenizer.tokenize(text)
+        # once, the edited paragraph is cached after the first run
+        edit_seconds = timed(tokenizer.tokenize, edited(text), repeat=1)
+
+        print(f'{name:>14}{len(document_tokens):>8}{differing:>11}{document_seconds:>12.4f}{edit_seconds:>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+The table-driven tokenizer rules against the per-token loop they replaced, kept in
+test/test_tokenizer/rule_reference.py, on the fixtures: tokens the two disagree on and
+the time each takes once spaCy has parsed the text. Needs the spaCy and DeBERTa models.
+
+PYTHONPATH=src:test python benchmark/bench_rule_engine.py
+"""
+from pathlib import Path
+
+from documents import timed
+from test_tokenizer.rule_reference import loop_rules
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+from tokenizer.deberta_tokenizer import DebertaTokenizer
+from tokenizer.rule_engine import apply_rules
+from tokenizer.spacy_tokenizer import spacy_tokenizer
+from tokenizer.token_stream import DEP_LABELS, POS_LABELS
+
+
+FIXTURES = Path(__file__).parent.parent / 'src'
+
+
+def main():
+    tokenizer = ContextAwareTokenizer(DebertaTokenizer(), spacy_tokenizer())
+    analyze = tokenizer.sub_token_cache.analyze
+
+    print(f'{"fixture":>14}{"tokens":>8}{"differing":>11}{"loop s":>10}{"table s":>10}')
+    for name in ('original.txt', 'revised.txt', 'original2.txt', 'revised2.txt'):
+        text = (FIXTURES / name).read_text(encoding='utf-8')
+        doc = tokenizer.spacy_tokenizer(text)
+        deberta_tokens = tokenizer.deberta_tokenizer.encode(text)
+
+        expected = loop_rules(doc, deberta_tokens, analyze)
+        starts, ends, pos, dep = apply_rules(doc, deberta_tokens, analyze)
+        tokens = list(zip(starts, ends, [POS_LABELS[code] for code in pos], [DEP_LABELS[code] for code in dep]))
+        # dep labels outside DEP_LABELS have code 0, compare them as missing
+        expected = [(start, end, pos_label, dep_label if dep_label in DEP_LABELS else '') for start, end, pos_label, dep_label in expected]
+        differing = len(set(tokens).symmetric_difference(expected))
+
+        print(
+            f'{name:>14}{len(tokens):>8}{differing:>11}'
+            f'{timed(loop_rules, doc, deberta_tokens, analyze):>10.4f}'
+            f'{timed(apply_rules, doc, deberta_tokens, analyze):>10.4f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
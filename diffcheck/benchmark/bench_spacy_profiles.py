@@ -0,0 +1,51 @@
+"""
+Resident memory and per-request latency of each spaCy profile, every profile measured in
+a fresh process. Latency is spaCy's parse of each fixture, best of 3. Differing counts
+the tokens whose pos or dep, the attributes the tokenizer rules read, differ from the full
+profile's. Needs the spaCy model.
+
+PYTHONPATH=src python benchmark/bench_spacy_profiles.py
+"""
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+from documents import timed
+from tokenizer.spacy_tokenizer import PROFILES, spacy_tokenizer
+
+
+FIXTURES = Path(__file__).parent.parent / 'src'
+
+
+def measure(profile: str):
+    """Prints the components, peak RSS in MiB, mean fixture latency in seconds and differing tokens of profile"""
+    nlp = spacy_tokenizer(profile)
+    texts = [(FIXTURES / name).read_text(encoding='utf-8') for name in ('original.txt', 'revised.txt', 'original2.txt', 'revised2.txt')]
+    latency = sum(timed(nlp, text) for text in texts) / len(texts)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    # loaded after the peak RSS is read
+    full = spacy_tokenizer('full')
+    differing = sum(
+        (token.pos, token.dep) != (full_token.pos, full_token.dep)
+        for text in texts
+        for token, full_token in zip(nlp(text), full(text))
+    )
+
+    print(f"{'+'.join(nlp.pipe_names)} {rss:.1f} {latency:.5f} {differing}")
+
+
+def main():
+    print(f'{"profile":>8}{"RSS MiB":>10}{"latency s":>11}{"differing":>11}  components')
+    for profile in PROFILES:
+        output = subprocess.run([sys.executable, __file__, profile], capture_output=True, text=True, check=True).stdout
+        components, rss, latency, differing = output.split()
+        print(f'{profile:>8}{float(rss):>10.1f}{float(latency):>11.5f}{int(differing):>11}  {components}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+    else:
+        main()
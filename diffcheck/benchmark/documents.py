@@ -0,0 +1,48 @@
+import random
+import time
+
+from tokenizer.context_aware_tokenizer import SpanToken
+
+
+def to_span_tokens(token_ids: list[int]) -> list[SpanToken]:
+    """Fake character offsets, one token per two characters"""
+    return [
+        (i * 2, i * 2 + 1, token_id)
+        for i, token_id in enumerate(token_ids)
+    ]
+
+
+def moved_block_documents(
+    blocks: int,
+    seed: int = 0,
+    block_length: tuple[int, int] = (3, 30),
+    vocabulary: int = 3000,
+    edit_rate: float = 0.02
+) -> tuple[list[int], list[int]]:
+    """Shuffled blocks of token IDs with a few substituted tokens on the right"""
+    generator = random.Random(seed)
+    paragraphs = [
+        [generator.randrange(vocabulary) for _ in range(generator.randint(*block_length))]
+        for _ in range(blocks)
+    ]
+    left = [token_id for paragraph in paragraphs for token_id in paragraph]
+
+    generator.shuffle(paragraphs)
+    right = [
+        token_id if generator.random() >= edit_rate else generator.randrange(vocabulary)
+        for paragraph in paragraphs
+        for token_id in paragraph
+    ]
+
+    return left, right
+
+
+def timed(function, *args, repeat: int = 3, **kwargs) -> float:
+    """Best of repeat wall times in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    return best
@@ -62,6 +62,7 @@ async def main():
             .with_exec(["pip", "install", "--no-cache-dir", "-r", "requirements.txt"])
             .with_env_variable("FLASK_ENV", "production")
             .with_env_variable("PYTHONPATH", "src")
+            .with_exec(["python", "-m", "tokenizer.build_fast_tokenizer"])
             .with_exposed_port(5000)
             .with_entrypoint(["python", "-u", "./src/web_app.py"])
         )
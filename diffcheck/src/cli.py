@@ -0,0 +1,42 @@
+"""
+Diff reports from the command line: every revision against the first file, or with
+--chain each file against the one before it.
+
+PYTHONPATH=src python src/cli.py original.txt revised.txt [revised2.txt ...]
+PYTHONPATH=src python src/cli.py --chain v1.txt v2.txt v3.txt
+"""
+import argparse
+import json
+from pathlib import Path
+
+from main import ChainSummary, compare_chain, compare_revisions, render_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Word count diff reports between text files')
+    parser.add_argument('files', nargs='+', type=Path, help='base file and its revisions, or the versions of a chain in order')
+    parser.add_argument('--chain', action='store_true', help='diff each file against the one before it')
+    args = parser.parse_args()
+    if len(args.files) < 2:
+        parser.error('at least two files are needed')
+
+    if args.chain:
+        summary = ChainSummary()
+        version_texts = (path.read_text(encoding='utf-8') for path in args.files)
+        for step, result in enumerate(compare_chain(version_texts), start=1):
+            summary.add(result)
+            print(f'== {args.files[step - 1]} -> {args.files[step]}')
+            print(render_report(result))
+        print(json.dumps(summary.to_dict()))
+        return
+
+    base_text, *revision_texts = [path.read_text(encoding='utf-8') for path in args.files]
+    results, seconds = compare_revisions(base_text, revision_texts)
+    for path, result in zip(args.files[1:], results):
+        print(f'== {args.files[0]} -> {path}')
+        print(render_report(result))
+    print(f'{len(results)} revisions in {seconds:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,240 @@
 import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Iterator, Union
 
+from matcher.backends import DEFAULT_BACKEND, get_matcher
+from matcher.budget import Budget
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, get_diff_engine
+from text_comparator.diff_result import DiffResult
+from text_comparator.fuzzy_moves import find_fuzzy_movements
 from text_comparator.get_text_diff import get_text_deltas
-from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+from text_comparator.hierarchical import hierarchical_deltas
+from text_comparator.incremental import IncrementalDiff, splice_tokens
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer, SpanToken
 from tokenizer.deberta_tokenizer import DebertaTokenizer
-from tokenizer.spacy_tokenizer import spacy_tokenizer
+from tokenizer.spacy_tokenizer import DEFAULT_PROFILE, spacy_tokenizer
+from tokenizer.token_cache import TokenCache
+from tokenizer.token_stream import TokenStream
 
 
-def text_tokens(tokenizer):
-    return lambda tokens: [
-        tokenizer.deberta_tokenizer.tokenizer.convert_ids_to_tokens(token[2]) if isinstance(token[2], int) else '[' + ','.join(tokenizer.deberta_tokenizer.tokenizer.convert_ids_to_tokens(token[2])) + ']'
-        for token in tokens
-    ]
+MATCHER_BACKEND = os.environ.get('DIFFCHECK_MATCHER_BACKEND', DEFAULT_BACKEND)
+MATCH_BUDGET_SECONDS = float(os.environ.get('DIFFCHECK_MATCH_BUDGET_SECONDS', '5'))
+DIFF_ENGINE = os.environ.get('DIFFCHECK_DIFF_ENGINE', DEFAULT_DIFF_ENGINE)
+diff_engine = get_diff_engine(DIFF_ENGINE)
+# processes compare_revisions spreads revisions over, shared by every request of this worker, 1 keeps them in the request's thread
+REVISION_WORKERS = int(os.environ.get('DIFFCHECK_REVISION_WORKERS', '1'))
+# pairs moved and lightly edited blocks left over by the exact matcher, see find_fuzzy_movements
+FUZZY_MOVES = os.environ.get('DIFFCHECK_FUZZY_MOVES', '0') == '1'
+# 'flat' diffs the whole token sequences, 'hierarchical' narrows down by paragraph and sentence first
+COMPARISON_MODE = os.environ.get('DIFFCHECK_COMPARISON_MODE', 'flat')
+# sentences of context around the edit when the right text is tokenized from the left one, -1 tokenizes it whole
+EDIT_CONTEXT_SENTENCES = int(os.environ.get('DIFFCHECK_EDIT_CONTEXT_SENTENCES', '1'))
+# spaCy components to load, 'rules' leaves out everything the tokenizer rules don't read
+SPACY_PROFILE = os.environ.get('DIFFCHECK_SPACY_PROFILE', DEFAULT_PROFILE)
+# texts per nlp.pipe and DeBERTa batch when several texts are tokenized together, and spaCy processes parsing them
+TOKENIZE_BATCH_SIZE = int(os.environ.get('DIFFCHECK_TOKENIZE_BATCH_SIZE', '32'))
+TOKENIZE_PROCESSES = int(os.environ.get('DIFFCHECK_TOKENIZE_PROCESSES', '1'))
+# in-process budget of the token cache, 0 turns it off
+TOKEN_CACHE_MB = int(os.environ.get('DIFFCHECK_TOKEN_CACHE_MB', '64'))
+# SQLite file shared by every worker as the token cache's second tier, unset keeps it in memory only
+TOKEN_CACHE_PATH = os.environ.get('DIFFCHECK_TOKEN_CACHE_PATH') or None
+# 'paragraph' tokenizes and caches each paragraph on its own, see ContextAwareTokenizer.tokenize_paragraphs
+TOKEN_CACHE_GRANULARITY = os.environ.get('DIFFCHECK_TOKEN_CACHE_GRANULARITY', 'document')
 
+tokenizer = ContextAwareTokenizer(DebertaTokenizer(), spacy_tokenizer(SPACY_PROFILE))
+if TOKEN_CACHE_MB > 0:
+    tokenizer.token_cache = TokenCache(tokenizer.version(), TOKEN_CACHE_MB << 20, TOKEN_CACHE_PATH)
+tokenizer.paragraph_granular = TOKEN_CACHE_GRANULARITY == 'paragraph'
 
-tokenizer = ContextAwareTokenizer(DebertaTokenizer(), spacy_tokenizer())
-to_text = text_tokens(tokenizer)
-def generate_diff_report(left_text: str, right_text: str) -> str:
+# spawned rather than forked, the tokenizers' thread pool is running by the time revisions come in, and
+# only in the worker itself, its pool processes import this module too
+revision_pool: Union[ProcessPoolExecutor, None] = None
+if REVISION_WORKERS > 1 and multiprocessing.parent_process() is None:
+    revision_pool = ProcessPoolExecutor(REVISION_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+
+def to_text(token_ids) -> list[str]:
+    return [tokenizer.interner.text(token_id) for token_id in token_ids]
+
+
+def result_token_ids(result: DiffResult) -> set[int]:
+    return {
+        *result.additions.token_ids,
+        *result.subtractions.token_ids,
+        *result.movements.pools[0],
+        *result.movements.pools[1]
+    }
+
+
+def compare_tokens(left_tokens: Union[list[SpanToken], TokenStream], right_tokens: Union[list[SpanToken], TokenStream]) -> DiffResult:
+    budget = Budget(MATCH_BUDGET_SECONDS)
+    result = get_text_deltas(left_tokens, right_tokens, get_matcher(MATCHER_BACKEND, budget=budget), diff_engine)
+    result.budgeted(budget)
+
+    if FUZZY_MOVES:
+        return find_fuzzy_movements(left_tokens, right_tokens, result, diff_engine=diff_engine)
+
+    return result
+
+
+def tokenize_pair(left_text: str, right_text: str) -> tuple[TokenStream, Union[list[SpanToken], TokenStream]]:
+    """
+    Tokens of both texts. The right text is only tokenized around where it differs from
+    the left, outside of it the left text's tokens are reused, see splice_tokens.
+    """
     left_tokens = tokenizer.tokenize(left_text)
-    right_tokens = tokenizer.tokenize(right_text)
-    additions, subtractions, movements = get_text_deltas(left_tokens, right_tokens)
-    
+
+    return left_tokens, splice_tokens(tokenizer.tokenize, left_text, left_tokens, right_text, EDIT_CONTEXT_SENTENCES)
+
+
+def compare_texts(left_text: str, right_text: str) -> DiffResult:
+    if COMPARISON_MODE == 'hierarchical':
+        budget = Budget(MATCH_BUDGET_SECONDS)
+        result = hierarchical_deltas(tokenizer.tokenize, left_text, right_text, get_matcher(MATCHER_BACKEND, budget=budget), diff_engine, budget)
+
+        return result.budgeted(budget)
+
+    return compare_tokens(*tokenize_pair(left_text, right_text))
+
+
+# IncrementalDiff of the last left texts compared by compare_edited, so that edits to the right text are
+# re-diffed incrementally. The lock only guards the table, each IncrementalDiff has its own lock.
+INCREMENTAL_DOCUMENTS = 16
+incremental_diffs: OrderedDict[str, IncrementalDiff] = OrderedDict()
+incremental_lock = threading.Lock()
+
+
+def compare_edited(left_text: str, right_text: str) -> DiffResult:
+    """Same as compare_texts, but reuses the work of the last call with the same left text"""
+    if COMPARISON_MODE == 'hierarchical':
+        return compare_texts(left_text, right_text)
+
+    with incremental_lock:
+        incremental_diff = incremental_diffs.get(left_text)
+        if incremental_diff is not None:
+            incremental_diffs.move_to_end(left_text)
+
+    if incremental_diff is None:
+        incremental_diff = IncrementalDiff(tokenizer.tokenize, left_text, MATCHER_BACKEND, diff_engine, EDIT_CONTEXT_SENTENCES)
+        with incremental_lock:
+            # another request may have added the same left text in the meantime
+            incremental_diff = incremental_diffs.setdefault(left_text, incremental_diff)
+            while len(incremental_diffs) > INCREMENTAL_DOCUMENTS:
+                incremental_diffs.popitem(last=False)
+
+    with incremental_diff.lock:
+        result = incremental_diff.update(right_text, Budget(MATCH_BUDGET_SECONDS))
+        if FUZZY_MOVES:
+            return find_fuzzy_movements(incremental_diff.left_tokens, incremental_diff.right_tokens, result, diff_engine=diff_engine)
+
+        return result
+
+
+def compare_revision(base_tokens: TokenStream, revision_text: str) -> tuple[DiffResult, dict[int, str]]:
+    """Comparison of a revision against the base, with the texts of its token IDs for the parent process"""
+    result = compare_tokens(base_tokens, tokenizer.tokenize(revision_text))
+
+    return result, tokenizer.interner.export(result_token_ids(result))
+
+
+def compare_revisions(base_text: str, revision_texts: list[str]) -> tuple[list[DiffResult], float]:
+    """
+    Diff every revision against one base text. The base is tokenized once, into a
+    TokenStream every comparison reads its columns from. With a revision pool the
+    revisions are tokenized and diffed in its processes, otherwise they are tokenized
+    in batches with the base and diffed in this thread. Returns the results in
+    revision order and the total seconds taken.
+    """
+    started = time.perf_counter()
+
+    if revision_pool is None or len(revision_texts) <= 1:
+        tokens, *revisions_tokens = tokenizer.tokenize_many([base_text, *revision_texts], TOKENIZE_BATCH_SIZE, TOKENIZE_PROCESSES)
+        results = [compare_tokens(tokens, revision_tokens) for revision_tokens in revisions_tokens]
+    else:
+        tokens = tokenizer.tokenize(base_text)
+        results = []
+        for result, texts in revision_pool.map(compare_revision, repeat(tokens), revision_texts):
+            tokenizer.interner.update(texts)
+            results.append(result)
+
+    return results, time.perf_counter() - started
+
+
+def compare_chain(version_texts: Iterable[str]) -> Iterator[DiffResult]:
+    """
+    Diff each version against the one before it. Every version is tokenized once, in
+    batches read ahead of the diffs, and only the previous version's tokens are kept, so
+    memory does not grow with the chain. Each version is diffed twice, both times
+    reading the columns of the TokenStream it was tokenized into.
+    """
+    previous_tokens = None
+    for tokens in tokenizer.tokenize_many(version_texts, TOKENIZE_BATCH_SIZE, TOKENIZE_PROCESSES):
+        if previous_tokens is not None:
+            yield compare_tokens(previous_tokens, tokens)
+        previous_tokens = tokens
+
+
+class ChainSummary:
+    """Running word counts over the steps of compare_chain"""
+    __slots__ = ('steps', 'added', 'removed', 'moved', 'partial')
+    steps: int
+    added: int
+    removed: int
+    moved: int
+    partial: bool
+
+    def __init__(self):
+        self.steps = 0
+        self.added = 0
+        self.removed = 0
+        self.moved = 0
+        self.partial = False
+
+    def add(self, result: DiffResult):
+        self.steps += 1
+        self.added += len(result.additions)
+        self.removed += len(result.subtractions)
+        self.moved += len(result.movements)
+        self.partial = self.partial or result.partial
+
+    def to_dict(self) -> dict:
+        return {
+            'steps': self.steps,
+            'added': self.added,
+            'removed': self.removed,
+            'moved': self.moved,
+            'partial': self.partial
+        }
+
+
+def render_report(result: DiffResult) -> str:
+    additions, subtractions, movements = result
+
     report = []
+    if result.partial:
+        report.append(f'APPROXIMATE: move detection stopped after {result.stopped_after:.2f}s, some moved blocks may be counted as added and removed words')
+        report.append('\n----------------------------------------------------------------------\n')
     report.append(f'ADDED WORD COUNT (total moved blocks + total added words)\nTotal\t\t{len(additions) + len(movements)}')
     report.append('\n----------------------------------------------------------------------\n')
     report.append(f'ADDED WORDS\nTotal\t\t{len(additions)}')
-    report.append(json.dumps(to_text(additions)))
+    report.append(json.dumps(to_text(additions.token_ids)))
     report.append(f'REMOVED WORDS\nTotal\t\t{len(subtractions)}')
-    report.append(json.dumps(to_text(subtractions)))
+    report.append(json.dumps(to_text(subtractions.token_ids)))
     report.append(f'MOVED BLOCKS\nTotal\t\t{len(movements)}')
-    report.append(json.dumps(to_text([movement[0] for movement in movements]), indent=2))
+    report.append(json.dumps([
+        '[' + ','.join(to_text(movements.token_ids(index, 0))) + ']'
+        + ('' if movements.scores[index] == 1 else f' ~{movements.scores[index]:.2f}')
+        for index in range(len(movements))
+    ], indent=2))
     
     return '\n'.join(report)
+
+
+def generate_diff_report(left_text: str, right_text: str) -> str:
+    return render_report(compare_texts(left_text, right_text))
@@ -0,0 +1,129 @@
+import heapq
+from typing import Union
+
+from matcher.budget import Budget
+from matcher.coverage import Coverage
+from matcher.longest_matches import SpanMatch
+
+
+HASH_BASE = 1_000_003
+HASH_MODULUS = (1 << 61) - 1
+
+
+def kgram_hashes(elements: list, k: int) -> list[int]:
+    """Rolling hash of every k-gram, hashes[i] covers elements[i:i + k]"""
+    if len(elements) < k:
+        return []
+
+    top = pow(HASH_BASE, k - 1, HASH_MODULUS)
+    value = 0
+    for element in elements[:k]:
+        value = (value * HASH_BASE + hash(element)) % HASH_MODULUS
+
+    hashes = [value]
+    for i in range(k, len(elements)):
+        value = ((value - hash(elements[i - k]) * top) * HASH_BASE + hash(elements[i])) % HASH_MODULUS
+        hashes.append(value)
+
+    return hashes
+
+
+def find_anchored_blocks(
+    left_elements: list,
+    right_elements: list,
+    k: int,
+    budget: Union[Budget, None] = None
+) -> list[SpanMatch]:
+    """
+    Maximal common runs of at least k elements.
+
+    Every k-gram of left is looked up in a hash table of the k-grams of right. A run
+    is first hit at its own start when left is walked in order, so each seed is
+    extended forward only and later seeds on the same diagonal inside it are skipped.
+    """
+    table: dict[int, list[int]] = {}
+    for right_index, value in enumerate(kgram_hashes(right_elements, k)):
+        table.setdefault(value, []).append(right_index)
+
+    blocks = []
+    run_ends: dict[int, int] = {}
+    for left_index, value in enumerate(kgram_hashes(left_elements, k)):
+        if budget is not None and budget.expired():
+            break
+
+        for right_index in table.get(value, ()):
+            diagonal = right_index - left_index
+            if run_ends.get(diagonal, -1) > left_index:
+                continue
+
+            length = 0
+            while (
+                left_index + length < len(left_elements)
+                and right_index + length < len(right_elements)
+                and left_elements[left_index + length] == right_elements[right_index + length]
+            ):
+                length += 1
+
+            if length >= k:
+                blocks.append(tuple((left_index, right_index, length)))
+                run_ends[diagonal] = left_index + length
+
+            if budget is not None:
+                budget.spend(length + 1)
+
+    return blocks
+
+
+def find_anchored_matching_spans(
+    left_tokens: list,
+    right_tokens: list,
+    k: int = 4,
+    min_length: int = 4,
+    budget: Union[Budget, None] = None
+) -> list[SpanMatch]:
+    """
+    Find by longest and closest, for moved blocks of at least min_length tokens.
+
+    Blocks are taken greedily from a heap. A block that overlaps one already taken is
+    cut down to its free stretches, which go back on the heap if they are still long
+    enough. Spans are positions in the original sequences.
+
+    With a budget, seeding stops once it has expired and the selection runs over the
+    blocks found so far.
+    """
+    if min_length < k:
+        raise ValueError(f"min_length ({min_length}) must be at least k ({k})")
+
+    heap = [
+        (-span[2], abs(span[0] - span[1]), span[0], span[1])
+        for span in find_anchored_blocks(left_tokens, right_tokens, k, budget)
+        if span[2] >= min_length
+    ]
+    heapq.heapify(heap)
+
+    matching_spans = []
+    left_coverage = Coverage(len(left_tokens))
+    right_coverage = Coverage(len(right_tokens))
+    while heap:
+        length, _, left_index, right_index = heapq.heappop(heap)
+        length = -length
+
+        if not left_coverage.overlaps(left_index, length) and not right_coverage.overlaps(right_index, length):
+            matching_spans.append(tuple((left_index, right_index, length)))
+            left_coverage.add(left_index, length)
+            right_coverage.add(right_index, length)
+            continue
+
+        start = 0
+        for offset in range(length + 1):
+            if offset < length and not left_coverage.bitmap[left_index + offset] and not right_coverage.bitmap[right_index + offset]:
+                continue
+
+            if offset - start >= min_length:
+                heapq.heappush(heap, (start - offset, abs(right_index - left_index), left_index + start, right_index + start))
+
+            start = offset + 1
+
+    matching_spans.sort(key=lambda matching_span: matching_span[0])
+
+    return matching_spans
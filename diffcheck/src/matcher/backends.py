@@ -0,0 +1,35 @@
+from functools import partial
+from typing import Callable, Sequence
+
+from matcher.anchored import find_anchored_matching_spans
+from matcher.longest_matches import SpanFinder, SpanMatch, find_best_matching_spans, find_matching_spans
+from matcher.suffix_array import find_suffix_array_spans
+from matcher.vectorized import find_vectorized_spans
+
+
+# token ID sequences: lists, array('q') columns or memoryview slices of them
+Matcher = Callable[[Sequence[int], Sequence[int]], list[SpanMatch]]
+
+SPAN_FINDERS: dict[str, SpanFinder] = {
+    'reference': find_matching_spans,
+    'suffix_array': find_suffix_array_spans,
+    'vectorized': find_vectorized_spans,
+}
+MATCHERS: dict[str, Matcher] = {
+    **{
+        backend: partial(find_best_matching_spans, find_spans=find_spans)
+        for backend, find_spans in SPAN_FINDERS.items()
+    },
+    'anchored': find_anchored_matching_spans,
+}
+DEFAULT_BACKEND = 'vectorized'
+
+
+def get_matcher(backend: str, **options) -> Matcher:
+    """Best span matcher for a backend, options are passed on to it (k and min_length for anchored)"""
+    try:
+        matcher = MATCHERS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown matcher backend: {backend}") from None
+
+    return partial(matcher, **options) if options else matcher
@@ -0,0 +1,45 @@
+import time
+from typing import Union
+
+
+class Budget:
+    """Time and work allowance for one comparison, exhausted once either runs out"""
+    seconds: Union[float, None]
+    started: float
+    deadline: Union[float, None]
+    work: Union[int, None]
+    spent: int
+    exhausted: bool
+    stopped_after: Union[float, None]
+
+    def __init__(self, seconds: Union[float, None] = None, work: Union[int, None] = None):
+        self.seconds = seconds
+        self.work = work
+        self.start()
+
+    def start(self):
+        """Starts the allowance over, for a budget handed in before the work it covers, like tokenizing, is done"""
+        self.started = time.monotonic()
+        self.deadline = None if self.seconds is None else self.started + self.seconds
+        self.spent = 0
+        self.exhausted = False
+        self.stopped_after = None
+
+    def spend(self, units: int = 1):
+        self.spent += units
+
+    def expired(self) -> bool:
+        """
+        Checked before more work is done, a result is only partial if this returned True.
+        stopped_after is set to the seconds since the budget started when it first does.
+        """
+        if not self.exhausted:
+            now = time.monotonic()
+            self.exhausted = (
+                (self.deadline is not None and now >= self.deadline)
+                or (self.work is not None and self.spent >= self.work)
+            )
+            if self.exhausted:
+                self.stopped_after = now - self.started
+
+        return self.exhausted
@@ -0,0 +1,31 @@
+from itertools import compress
+
+
+FLIP = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class Coverage:
+    """Bitmap of the token positions claimed by accepted spans"""
+    bitmap: bytearray
+
+    def __init__(self, size: int):
+        self.bitmap = bytearray(size)
+
+    def add(self, start: int, length: int):
+        self.bitmap[start:start + length] = b'\x01' * length
+
+    def add_spans(self, spans: list[tuple[int, int, int]], side: int):
+        """Cover every span on one side, 0 for left and 1 for right"""
+        for span in spans:
+            self.add(span[side], span[2])
+
+    def overlaps(self, start: int, length: int) -> bool:
+        return self.bitmap.find(1, start, start + length) != -1
+
+    def uncovered_mask(self) -> bytes:
+        """One byte per position, 1 where the position is not covered"""
+        return self.bitmap.translate(FLIP)
+
+    def uncovered(self, elements: list) -> list:
+        """Elements whose position is not covered, in order"""
+        return list(compress(elements, self.uncovered_mask()))
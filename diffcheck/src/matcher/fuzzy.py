@@ -0,0 +1,97 @@
+import numpy as np
+
+
+SHINGLE_LENGTH = 2
+PERMUTATIONS = 64
+BANDS = 16
+HASH_PRIME = (1 << 31) - 1
+
+FuzzyPair = tuple[int, int, float]
+
+
+def shingles(token_ids: list, k: int = SHINGLE_LENGTH) -> set[tuple]:
+    """Every run of k token IDs, a block shorter than k is one shingle"""
+    if len(token_ids) < k:
+        return {tuple(token_ids)}
+
+    return set(zip(*(token_ids[offset:] for offset in range(k))))
+
+
+def minhash_signatures(shingle_sets: list[set[tuple]], permutations: int = PERMUTATIONS, seed: int = 0) -> np.ndarray:
+    """
+    One row of permutations minimum hashes per shingle set. The permutations are
+    (a * x + b) mod HASH_PRIME over the Python hash of each shingle.
+    """
+    if not shingle_sets:
+        return np.zeros((0, permutations), dtype=np.int64)
+
+    generator = np.random.default_rng(seed)
+    a = generator.integers(1, HASH_PRIME, size=(permutations, 1), dtype=np.int64)
+    b = generator.integers(0, HASH_PRIME, size=(permutations, 1), dtype=np.int64)
+
+    values = np.fromiter(
+        (hash(shingle) % HASH_PRIME for shingle_set in shingle_sets for shingle in shingle_set),
+        dtype=np.int64
+    )
+    starts = np.cumsum([0] + [len(shingle_set) for shingle_set in shingle_sets[:-1]])
+    hashed = (a * values + b) % HASH_PRIME
+
+    return np.minimum.reduceat(hashed, starts, axis=1).T
+
+
+def lsh_candidates(left_signatures: np.ndarray, right_signatures: np.ndarray, bands: int = BANDS) -> set[tuple[int, int]]:
+    """(left, right) pairs of signatures that agree on every row of at least one band"""
+    rows = left_signatures.shape[1] // bands
+    candidates = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = {}
+        for index, signature in enumerate(left_signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(signature.tobytes(), []).append(index)
+
+        for right_index, signature in enumerate(right_signatures[:, band * rows:(band + 1) * rows]):
+            for left_index in buckets.get(signature.tobytes(), ()):
+                candidates.add(tuple((left_index, right_index)))
+
+    return candidates
+
+
+def find_fuzzy_pairs(
+    left_blocks: list[list],
+    right_blocks: list[list],
+    threshold: float = 0.5,
+    permutations: int = PERMUTATIONS,
+    bands: int = BANDS
+) -> list[FuzzyPair]:
+    """
+    Near-duplicate (left block, right block, similarity) pairs, each block in at most one.
+
+    Candidates come from LSH buckets over MinHash signatures, so blocks are never compared
+    all against all. Candidates are scored by the Jaccard similarity of their shingles and
+    taken greedily from the most similar down to threshold.
+    """
+    left_shingles = [shingles(block) for block in left_blocks]
+    right_shingles = [shingles(block) for block in right_blocks]
+    candidates = lsh_candidates(
+        minhash_signatures(left_shingles, permutations),
+        minhash_signatures(right_shingles, permutations),
+        bands
+    )
+
+    scored = []
+    for left_index, right_index in candidates:
+        intersection = len(left_shingles[left_index] & right_shingles[right_index])
+        similarity = intersection / (len(left_shingles[left_index]) + len(right_shingles[right_index]) - intersection)
+        if similarity >= threshold:
+            scored.append(tuple((left_index, right_index, similarity)))
+    scored.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    pairs = []
+    used_left = set()
+    used_right = set()
+    for left_index, right_index, similarity in scored:
+        if left_index not in used_left and right_index not in used_right:
+            pairs.append(tuple((left_index, right_index, similarity)))
+            used_left.add(left_index)
+            used_right.add(right_index)
+
+    return pairs
@@ -1,14 +1,27 @@
+from typing import Callable, Sequence, Union
+
+from matcher.budget import Budget
+from matcher.coverage import Coverage
+
+
 SpanMatch = tuple[int, int, int]
+SpanFinder = Callable[[list, list, Union[Budget, None]], list[SpanMatch]]
 
 
 def find_matching_spans(
     left_elements: list,
-    right_elements: list
+    right_elements: list,
+    budget: Union[Budget, None] = None
 ) -> list[tuple[int, int, int]]:
+    """With a budget, the scan stops at the first left index after it has expired"""
     matching_spans = []
 
     left_index = 0
     while left_index < len(left_elements):
+        if budget is not None and budget.expired():
+            break
+
+        row_start = len(matching_spans)
         element = left_elements[left_index]
 
         right_index = 0
@@ -29,55 +42,99 @@ def find_matching_spans(
 
             right_index += length
 
+        if budget is not None:
+            budget.spend(len(matching_spans) - row_start)
         left_index += 1
 
     return matching_spans
 
 
+def original_spans(span: SpanMatch, left_positions: Sequence[int], right_positions: Sequence[int]) -> list[SpanMatch]:
+    """
+    A span over the uncovered tokens as spans over the original sequences. A run of
+    uncovered tokens can cross a covered gap on either side, it is split there and the
+    pieces shorter than two tokens are dropped.
+    """
+    left_index, right_index, length = span
+    left_start = left_positions[left_index]
+    right_start = right_positions[right_index]
+    if left_positions[left_index + length - 1] - left_start == right_positions[right_index + length - 1] - right_start == length - 1:
+        return [tuple((left_start, right_start, length))]
+
+    pieces = []
+    start = 0
+    for offset in range(1, length + 1):
+        if (
+            offset < length
+            and left_positions[left_index + offset] == left_positions[left_index + offset - 1] + 1
+            and right_positions[right_index + offset] == right_positions[right_index + offset - 1] + 1
+        ):
+            continue
+
+        if offset - start > 1:
+            pieces.append(tuple((left_positions[left_index + start], right_positions[right_index + start], offset - start)))
+        start = offset
+
+    return pieces
+
+
 def find_best_matching_spans(
     left_tokens: list,
-    right_tokens: list
+    right_tokens: list,
+    find_spans: SpanFinder = find_matching_spans,
+    budget: Union[Budget, None] = None
 ) -> list[SpanMatch]:
-    """Find by longest and closest"""
+    """
+    Find by longest and closest.
+
+    After the first round spans are searched among the tokens no accepted span covers,
+    with the original position of each of them kept alongside, so every span is mapped
+    back to positions in left_tokens and right_tokens before it is ranked.
+
+    With a budget, find_spans stops searching once it has expired, the spans it found
+    until then are still ranked and accepted and no new round is started. Every span
+    found is a unit of work, budget.exhausted tells the caller the result is partial.
+    """
     matching_spans = []
+    left_coverage = Coverage(len(left_tokens))
+    right_coverage = Coverage(len(right_tokens))
+    left_positions = range(len(left_tokens))
+    right_positions = range(len(right_tokens))
+    left_uncovered = left_tokens
+    right_uncovered = right_tokens
+
+    while left_uncovered:
+        if budget is not None and budget.expired():
+            break
 
-    while left_tokens:
-        all_matching_spans = find_matching_spans(left_tokens, right_tokens)
+        all_matching_spans = find_spans(left_uncovered, right_uncovered, budget)
 
         if len(all_matching_spans) == 0:
             break
 
+        if matching_spans:
+            all_matching_spans = [
+                piece
+                for span in all_matching_spans
+                for piece in original_spans(span, left_positions, right_positions)
+            ]
         all_matching_spans.sort(key=lambda match: (match[2], -abs(match[0] - match[1])), reverse=True)
 
-        for span_left in all_matching_spans:
-            if not any(
-                (span_right[0] < span_left[0] + span_left[2]
-                    and span_left[0] < span_right[0] + span_right[2]
-                )
-                or (span_right[1] < span_left[1] + span_left[2]
-                    and span_left[1] < span_right[1] + span_right[2]
-                )
-                for span_right in matching_spans
-            ):
-                matching_spans.append(span_left)
-
-        left_tokens = [
-            token
-            for i, token in enumerate(left_tokens)
-            if not any(
-                span[0] <= i < span[0] + span[2]
-                for span in matching_spans
-            )
-        ]
-
-        right_tokens = [
-            token
-            for i, token in enumerate(right_tokens)
-            if not any(
-                span[1] <= i < span[1] + span[2]
-                for span in matching_spans
-            )
-        ]
+        accepted = len(matching_spans)
+        for span in all_matching_spans:
+            if not left_coverage.overlaps(span[0], span[2]) and not right_coverage.overlaps(span[1], span[2]):
+                matching_spans.append(span)
+                left_coverage.add(span[0], span[2])
+                right_coverage.add(span[1], span[2])
+
+        # every span crossed a covered gap and was split into single tokens
+        if len(matching_spans) == accepted:
+            break
+
+        left_positions = left_coverage.uncovered(range(len(left_tokens)))
+        right_positions = right_coverage.uncovered(range(len(right_tokens)))
+        left_uncovered = left_coverage.uncovered(left_tokens)
+        right_uncovered = right_coverage.uncovered(right_tokens)
 
     matching_spans.sort(key=lambda matching_span: matching_span[0])
 
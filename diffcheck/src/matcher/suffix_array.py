@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from typing import Union
+
+from matcher.budget import Budget
+from matcher.longest_matches import SpanMatch
+
+
+def encode_sequences(left_elements: list, right_elements: list) -> list[int]:
+    """Map both sides onto dense integer codes joined by a unique separator"""
+    codes = {}
+    left_codes = [codes.setdefault(element, len(codes)) for element in left_elements]
+    right_codes = [codes.setdefault(element, len(codes)) for element in right_elements]
+
+    return left_codes + [len(codes)] + right_codes
+
+
+def build_suffix_array(sequence: list[int]) -> list[int]:
+    """Prefix doubling, stops as soon as every suffix has a distinct rank"""
+    n = len(sequence)
+    rank = list(sequence)
+    suffix_array = sorted(range(n), key=rank.__getitem__)
+
+    k = 1
+    while k < n:
+        width = n + 1
+        keys = [
+            rank[i] * width + (rank[i + k] + 1 if i + k < n else 0)
+            for i in range(n)
+        ]
+        suffix_array.sort(key=keys.__getitem__)
+
+        new_rank = [0] * n
+        for position in range(1, n):
+            new_rank[suffix_array[position]] = new_rank[suffix_array[position - 1]] + (
+                keys[suffix_array[position]] != keys[suffix_array[position - 1]]
+            )
+        rank = new_rank
+
+        if rank[suffix_array[-1]] == n - 1:
+            break
+
+        k <<= 1
+
+    return suffix_array
+
+
+def build_lcp(sequence: list[int], suffix_array: list[int]) -> tuple[list[int], list[int]]:
+    """Kasai, lcp[i] is the common prefix of suffix_array[i - 1] and suffix_array[i]"""
+    n = len(sequence)
+    rank = [0] * n
+    for position, suffix in enumerate(suffix_array):
+        rank[suffix] = position
+
+    lcp = [0] * n
+    length = 0
+    for suffix in range(n):
+        if rank[suffix] == 0:
+            length = 0
+            continue
+
+        previous = suffix_array[rank[suffix] - 1]
+        while suffix + length < n and previous + length < n and sequence[suffix + length] == sequence[previous + length]:
+            length += 1
+
+        lcp[rank[suffix]] = length
+        if length > 0:
+            length -= 1
+
+    return lcp, rank
+
+
+class LongestCommonExtension:
+    """Constant time longest common extension queries over a suffix array"""
+    rank: list[int]
+    table: list[list[int]]
+
+    def __init__(self, sequence: list[int]):
+        suffix_array = build_suffix_array(sequence)
+        lcp, self.rank = build_lcp(sequence, suffix_array)
+
+        self.table = [lcp]
+        width = 1
+        while width * 2 <= len(lcp):
+            level = self.table[-1]
+            self.table.append([
+                min(level[i], level[i + width])
+                for i in range(len(level) - width)
+            ])
+            width *= 2
+
+    def query(self, left_suffix: int, right_suffix: int) -> int:
+        low = self.rank[left_suffix]
+        high = self.rank[right_suffix]
+        if low > high:
+            low, high = high, low
+
+        low += 1
+        level = (high - low + 1).bit_length() - 1
+        row = self.table[level]
+
+        return min(row[low], row[high - (1 << level) + 1])
+
+
+def find_suffix_array_spans(
+    left_elements: list,
+    right_elements: list,
+    budget: Union[Budget, None] = None
+) -> list[SpanMatch]:
+    """
+    Same spans, in the same order, as longest_matches.find_matching_spans.
+
+    The reference scans right for every left index and, after a match of length n,
+    resumes n positions later. Only positions where the next element also matches can
+    yield a span, so the scan is replayed over a bigram index and the length of every
+    span is read from the suffix array instead of being compared element by element.
+    With a budget, the scan stops at the first left index after it has expired.
+    """
+    matching_spans = []
+
+    if len(left_elements) < 2 or len(right_elements) < 2:
+        return matching_spans
+
+    bigrams: dict[tuple, list[int]] = {}
+    for right_index, bigram in enumerate(zip(right_elements, right_elements[1:])):
+        bigrams.setdefault(bigram, []).append(right_index)
+
+    extension = LongestCommonExtension(encode_sequences(left_elements, right_elements))
+    right_offset = len(left_elements) + 1
+
+    for left_index, bigram in enumerate(zip(left_elements, left_elements[1:])):
+        if budget is not None and budget.expired():
+            break
+
+        positions = bigrams.get(bigram)
+        if positions is None:
+            continue
+
+        row_start = len(matching_spans)
+        position = 0
+        while position < len(positions):
+            right_index = positions[position]
+            length = extension.query(left_index, right_offset + right_index)
+
+            matching_spans.append(tuple((
+                left_index,
+                right_index,
+                length
+            )))
+
+            position = bisect_left(positions, right_index + length, position + 1)
+
+        if budget is not None:
+            budget.spend(len(matching_spans) - row_start)
+
+    return matching_spans
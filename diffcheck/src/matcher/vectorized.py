@@ -0,0 +1,150 @@
+from typing import Union
+
+import numpy as np
+
+from matcher.budget import Budget
+from matcher.longest_matches import SpanMatch
+
+
+# working memory of one block, the NumPy temporaries take up to about PAIR_BYTES per equal pair
+BLOCK_MEMORY = 32 << 20
+PAIR_BYTES = 128
+BLOCK_PAIRS = BLOCK_MEMORY // PAIR_BYTES
+# smaller blocks under a budget, so that it is checked every few milliseconds
+BUDGET_BLOCK_PAIRS = 1 << 14
+
+
+def block_spans(
+    rows: np.ndarray,
+    columns: np.ndarray,
+    top: int,
+    bottom: int,
+    carry: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run lengths of equal pairs within a block of left rows.
+
+    Pairs are grouped by diagonal, a run is a stretch of consecutive rows on one
+    diagonal and the length of a pair is the distance to the end of its run. Runs
+    touching the bottom of the block continue with the lengths carried up from the
+    block below.
+    """
+    diagonals = columns - rows
+    by_diagonal = np.lexsort((rows, diagonals))
+    rows = rows[by_diagonal]
+    columns = columns[by_diagonal]
+    diagonals = diagonals[by_diagonal]
+
+    run_start = np.ones(len(rows), dtype=bool)
+    run_start[1:] = (diagonals[1:] != diagonals[:-1]) | (rows[1:] != rows[:-1] + 1)
+    run_ids = np.cumsum(run_start) - 1
+    run_last = np.flatnonzero(np.append(run_start[1:], True))
+
+    lengths = run_last[run_ids] - np.arange(len(rows)) + 1
+    extension = np.where(rows[run_last] == bottom - 1, carry[columns[run_last] + 1], 0)
+    lengths += extension[run_ids]
+
+    next_carry = np.zeros_like(carry)
+    top_row = rows == top
+    next_carry[columns[top_row]] = lengths[top_row]
+
+    return rows, columns, lengths, next_carry
+
+
+def walk_rows(
+    rows: np.ndarray,
+    columns: np.ndarray,
+    lengths: np.ndarray,
+    width: int
+) -> np.ndarray:
+    """
+    Replay the reference scan for every row at once.
+
+    Within a row the scan resumes after each span, so the next span is the first
+    one starting at or past the end of the current one.
+    """
+    keys = rows.astype(np.int64) * width + columns
+    order = np.argsort(keys)
+    keys = keys[order]
+    rows = rows[order]
+
+    frontier = np.flatnonzero(np.append(True, rows[1:] != rows[:-1]))
+    emitted = []
+    while len(frontier):
+        emitted.append(frontier)
+        following = np.searchsorted(keys, keys[frontier] + lengths[order[frontier]])
+        valid = following < len(keys)
+        frontier, following = frontier[valid], following[valid]
+        frontier = following[rows[following] == rows[frontier]]
+
+    return order[np.sort(np.concatenate(emitted))]
+
+
+def find_vectorized_spans(
+    left_elements: list,
+    right_elements: list,
+    budget: Union[Budget, None] = None,
+    block_pairs: Union[int, None] = None
+) -> list[SpanMatch]:
+    """
+    Same spans, in the same order, as longest_matches.find_matching_spans.
+
+    Equal (left, right) pairs are generated from a sorted copy of right, processed in
+    blocks of left rows holding at most block_pairs pairs, from the bottom up so that
+    diagonal runs can be continued across block boundaries.
+
+    With a budget, no block is started once it has expired and the spans of the rows
+    below are returned, their lengths are complete.
+    """
+    left = np.asarray(left_elements, dtype=np.int64)
+    right = np.asarray(right_elements, dtype=np.int64)
+    if block_pairs is None:
+        block_pairs = BLOCK_PAIRS if budget is None else BUDGET_BLOCK_PAIRS
+
+    if len(left) < 2 or len(right) < 2:
+        return []
+
+    order = np.argsort(right, kind='stable')
+    sorted_right = right[order]
+    low = np.searchsorted(sorted_right, left, 'left')
+    counts = np.searchsorted(sorted_right, left, 'right') - low
+    cumulative = np.append(0, np.cumsum(counts))
+
+    blocks = []
+    carry = np.zeros(len(right) + 1, dtype=np.int64)
+    bottom = len(left)
+    while bottom > 0:
+        if budget is not None and budget.expired():
+            break
+
+        top = int(np.searchsorted(cumulative, cumulative[bottom] - block_pairs))
+        top = min(top, bottom - 1)
+
+        block_counts = counts[top:bottom]
+        total = int(block_counts.sum())
+        if total == 0:
+            carry = np.zeros_like(carry)
+            bottom = top
+            continue
+
+        rows = np.repeat(np.arange(top, bottom), block_counts)
+        offsets = np.repeat(low[top:bottom] - cumulative[top:bottom] + cumulative[top], block_counts) + np.arange(total)
+        columns = order[offsets]
+
+        rows, columns, lengths, carry = block_spans(rows, columns, top, bottom, carry)
+
+        spans = lengths > 1
+        rows, columns, lengths = rows[spans], columns[spans], lengths[spans]
+        if len(rows):
+            emitted = walk_rows(rows, columns, lengths, len(right) + 1)
+            blocks.append((rows[emitted], columns[emitted], lengths[emitted]))
+            if budget is not None:
+                budget.spend(len(emitted))
+
+        bottom = top
+
+    matching_spans = []
+    for rows, columns, lengths in reversed(blocks):
+        matching_spans.extend(zip(rows.tolist(), columns.tolist(), lengths.tolist()))
+
+    return matching_spans
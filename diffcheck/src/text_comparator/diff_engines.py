@@ -0,0 +1,56 @@
+import difflib
+from typing import Callable
+
+from text_comparator.histogram import histogram_matching_blocks
+from text_comparator.myers import MatchingBlock, myers_matching_blocks
+
+
+OpCode = tuple[str, int, int, int, int]
+DiffEngine = Callable[[list, list], list[OpCode]]
+
+
+def opcodes_from_blocks(blocks: list[MatchingBlock]) -> list[OpCode]:
+    """Same as difflib.SequenceMatcher.get_opcodes for a list of matching blocks"""
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in blocks:
+        if i < block_i and j < block_j:
+            opcodes.append(tuple(('replace', i, block_i, j, block_j)))
+        elif i < block_i:
+            opcodes.append(tuple(('delete', i, block_i, j, block_j)))
+        elif j < block_j:
+            opcodes.append(tuple(('insert', i, block_i, j, block_j)))
+
+        i = block_i + size
+        j = block_j + size
+        if size:
+            opcodes.append(tuple(('equal', block_i, i, block_j, j)))
+
+    return opcodes
+
+
+def difflib_opcodes(left_input: list, right_input: list) -> list[OpCode]:
+    return difflib.SequenceMatcher(None, left_input, right_input).get_opcodes()
+
+
+def myers_opcodes(left_input: list, right_input: list) -> list[OpCode]:
+    return opcodes_from_blocks(myers_matching_blocks(left_input, right_input))
+
+
+def histogram_opcodes(left_input: list, right_input: list) -> list[OpCode]:
+    return opcodes_from_blocks(histogram_matching_blocks(left_input, right_input))
+
+
+DIFF_ENGINES: dict[str, DiffEngine] = {
+    'difflib': difflib_opcodes,
+    'myers': myers_opcodes,
+    'histogram': histogram_opcodes,
+}
+DEFAULT_DIFF_ENGINE = 'difflib'
+
+
+def get_diff_engine(engine: str) -> DiffEngine:
+    try:
+        return DIFF_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown diff engine: {engine}") from None
@@ -0,0 +1,261 @@
+from array import array
+from typing import Iterator, Sequence, Union
+
+from matcher.budget import Budget
+from tokenizer.context_aware_tokenizer import SpanToken
+
+
+# (left start, left end, right start, right end, left token IDs, right token IDs, score)
+MovementRow = tuple[int, int, int, int, Sequence[int], Sequence[int], float]
+
+
+class TokenView:
+    """(start, end, token_id) row of a TokenColumns, indexes like a SpanToken tuple"""
+    __slots__ = ('columns', 'index')
+    columns: 'TokenColumns'
+    index: int
+
+    def __init__(self, columns: 'TokenColumns', index: int):
+        self.columns = columns
+        self.index = index
+
+    def __getitem__(self, field: int) -> int:
+        return self.columns.fields[field][self.index]
+
+    def __len__(self) -> int:
+        return 3
+
+    def __iter__(self) -> Iterator[int]:
+        return (column[self.index] for column in self.columns.fields)
+
+    def __eq__(self, other) -> bool:
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return repr(tuple(self))
+
+
+class TokenColumns:
+    """Tokens stored as parallel start, end and token ID arrays"""
+    __slots__ = ('starts', 'ends', 'token_ids', 'fields')
+    starts: array
+    ends: array
+    token_ids: array
+    fields: tuple[array, array, array]
+
+    def __init__(self, starts: array, ends: array, token_ids: array):
+        self.starts = starts
+        self.ends = ends
+        self.token_ids = token_ids
+        self.fields = (starts, ends, token_ids)
+
+    @staticmethod
+    def from_tokens(tokens: list[SpanToken]) -> 'TokenColumns':
+        starts, ends, token_ids = zip(*tokens) if tokens else ((), (), ())
+
+        return TokenColumns(array('i', starts), array('i', ends), array('q', token_ids))
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def __getitem__(self, index: int) -> TokenView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('token index out of range')
+
+        return TokenView(self, index)
+
+    def __iter__(self) -> Iterator[TokenView]:
+        return (TokenView(self, index) for index in range(len(self)))
+
+
+class MovementSideView:
+    """(start, end, token_ids) of one side of a movement, the token IDs are sliced on access"""
+    __slots__ = ('movements', 'index', 'side')
+    movements: 'MovementColumns'
+    index: int
+    side: int
+
+    def __init__(self, movements: 'MovementColumns', index: int, side: int):
+        self.movements = movements
+        self.index = index
+        self.side = side
+
+    @property
+    def start(self) -> int:
+        return self.movements.starts[self.side][self.index]
+
+    @property
+    def end(self) -> int:
+        return self.movements.ends[self.side][self.index]
+
+    @property
+    def token_ids(self) -> array:
+        return self.movements.token_ids(self.index, self.side)
+
+    def __getitem__(self, field: int) -> Union[int, list[int]]:
+        if field < 0:
+            field += 3
+        if field == 0:
+            return self.start
+        if field == 1:
+            return self.end
+        if field == 2:
+            return self.token_ids.tolist()
+
+        raise IndexError('movement field out of range')
+
+    def __len__(self) -> int:
+        return 3
+
+    def __iter__(self) -> Iterator[Union[int, list[int]]]:
+        return iter((self.start, self.end, self.token_ids.tolist()))
+
+
+class MovementView:
+    """(left side, right side) row of a MovementColumns"""
+    __slots__ = ('movements', 'index')
+    movements: 'MovementColumns'
+    index: int
+
+    def __init__(self, movements: 'MovementColumns', index: int):
+        self.movements = movements
+        self.index = index
+
+    def __getitem__(self, side: int) -> MovementSideView:
+        if side < 0:
+            side += 2
+        if side not in (0, 1):
+            raise IndexError('movement side out of range')
+
+        return MovementSideView(self.movements, self.index, side)
+
+    def __len__(self) -> int:
+        return 2
+
+    def __iter__(self) -> Iterator[MovementSideView]:
+        return (MovementSideView(self.movements, self.index, side) for side in (0, 1))
+
+
+class MovementColumns:
+    """
+    Moved blocks as parallel arrays. The token IDs of both sides live in one pool per
+    side, a movement only stores where its IDs start in each pool and how many it has.
+    Exact moves have the same IDs on both sides and a score of 1, fuzzy moves score
+    the similarity of their sides.
+    """
+    __slots__ = ('starts', 'ends', 'offsets', 'lengths', 'pools', 'scores')
+    starts: tuple[array, array]
+    ends: tuple[array, array]
+    offsets: tuple[array, array]
+    lengths: tuple[array, array]
+    pools: tuple[array, array]
+    scores: array
+
+    def __init__(
+        self,
+        starts: tuple[array, array],
+        ends: tuple[array, array],
+        offsets: tuple[array, array],
+        lengths: tuple[array, array],
+        pools: tuple[array, array],
+        scores: array
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.lengths = lengths
+        self.pools = pools
+        self.scores = scores
+
+    @staticmethod
+    def from_rows(rows: list[MovementRow]) -> 'MovementColumns':
+        offsets = (array('i'), array('i'))
+        pools = (array('q'), array('q'))
+        for row in rows:
+            for side in (0, 1):
+                offsets[side].append(len(pools[side]))
+                pools[side].extend(row[4 + side])
+
+        return MovementColumns(
+            starts=(array('i', [row[0] for row in rows]), array('i', [row[2] for row in rows])),
+            ends=(array('i', [row[1] for row in rows]), array('i', [row[3] for row in rows])),
+            offsets=offsets,
+            lengths=(array('i', [len(row[4]) for row in rows]), array('i', [len(row[5]) for row in rows])),
+            pools=pools,
+            scores=array('d', [row[6] for row in rows])
+        )
+
+    def rows(self) -> list[MovementRow]:
+        return [
+            tuple((
+                self.starts[0][index],
+                self.ends[0][index],
+                self.starts[1][index],
+                self.ends[1][index],
+                self.token_ids(index, 0),
+                self.token_ids(index, 1),
+                self.scores[index]
+            ))
+            for index in range(len(self))
+        ]
+
+    def token_ids(self, index: int, side: int) -> array:
+        offset = self.offsets[side][index]
+
+        return self.pools[side][offset:offset + self.lengths[side][index]]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index: int) -> MovementView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('movement index out of range')
+
+        return MovementView(self, index)
+
+    def __iter__(self) -> Iterator[MovementView]:
+        return (MovementView(self, index) for index in range(len(self)))
+
+
+class DiffResult:
+    """
+    Additions, subtractions and movements of a comparison. Unpacks like the
+    (additions, subtractions, movements) tuple get_text_deltas used to return.
+
+    A partial result is one whose move detection ran out of its budget, stopped_after
+    is the seconds it had run by then.
+    """
+    __slots__ = ('additions', 'subtractions', 'movements', 'partial', 'stopped_after')
+    additions: TokenColumns
+    subtractions: TokenColumns
+    movements: MovementColumns
+    partial: bool
+    stopped_after: Union[float, None]
+
+    def __init__(
+        self,
+        additions: TokenColumns,
+        subtractions: TokenColumns,
+        movements: MovementColumns,
+        partial: bool = False,
+        stopped_after: Union[float, None] = None
+    ):
+        self.additions = additions
+        self.subtractions = subtractions
+        self.movements = movements
+        self.partial = partial
+        self.stopped_after = stopped_after
+
+    def budgeted(self, budget: Budget) -> 'DiffResult':
+        """Marks the result partial if budget ran out while it was computed"""
+        self.partial = budget.exhausted
+        self.stopped_after = budget.stopped_after
+
+        return self
+
+    def __iter__(self) -> Iterator[Union[TokenColumns, MovementColumns]]:
+        return iter((self.additions, self.subtractions, self.movements))
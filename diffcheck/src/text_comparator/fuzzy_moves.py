@@ -0,0 +1,108 @@
+from bisect import bisect_right
+from typing import Union
+
+from matcher.fuzzy import find_fuzzy_pairs
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, DiffEngine, get_diff_engine
+from text_comparator.diff_result import DiffResult, MovementColumns, MovementRow, TokenColumns
+from tokenizer.context_aware_tokenizer import SpanToken
+from tokenizer.token_stream import TokenStream
+
+
+MIN_BLOCK_LENGTH = 8
+
+
+def changed_blocks(tokens: Union[list[SpanToken], TokenStream], leftovers: TokenColumns, moved_ranges: list[tuple[int, int]], min_length: int) -> list[list[SpanToken]]:
+    """
+    Runs of consecutive tokens that are either left over or inside a moved block, a block
+    moved in pieces is one run with the words edited between the pieces. Runs shorter
+    than min_length are left out.
+    """
+    positions = {token[0]: index for index, token in enumerate(tokens)}
+    changed = bytearray(len(tokens))
+    for start in leftovers.starts:
+        changed[positions[start]] = 1
+    for start, end in moved_ranges:
+        index = positions[start]
+        while index < len(tokens) and tokens[index][1] <= end:
+            changed[index] = 1
+            index += 1
+
+    blocks = []
+    index = changed.find(1)
+    while index != -1:
+        end = changed.find(0, index)
+        if end == -1:
+            end = len(tokens)
+        if end - index >= min_length:
+            blocks.append(tokens[index:end])
+        index = changed.find(1, end)
+
+    return blocks
+
+
+def find_fuzzy_movements(
+    left_tokens: Union[list[SpanToken], TokenStream],
+    right_tokens: Union[list[SpanToken], TokenStream],
+    result: DiffResult,
+    threshold: float = 0.5,
+    min_length: int = MIN_BLOCK_LENGTH,
+    diff_engine: DiffEngine = get_diff_engine(DEFAULT_DIFF_ENGINE)
+) -> DiffResult:
+    """
+    Moved and lightly edited blocks among the leftover additions and subtractions of result.
+
+    The exact matcher breaks such a block into short moves around the edits, or leaves
+    it as a full removal and addition. Changed runs of at least min_length tokens are
+    paired with changed runs on the other side whose shingles are at least threshold
+    similar. Each pair becomes one movement scored with that similarity and takes over
+    the exact moves inside it. Tokens the two sides share are no longer counted as added
+    or removed, the words edited inside the block still are.
+    """
+    rows = result.movements.rows()
+    left_blocks = changed_blocks(left_tokens, result.subtractions, [tuple((row[0], row[1])) for row in rows], min_length)
+    right_blocks = changed_blocks(right_tokens, result.additions, [tuple((row[2], row[3])) for row in rows], min_length)
+    pairs = find_fuzzy_pairs(
+        [[token[2] for token in block] for block in left_blocks],
+        [[token[2] for token in block] for block in right_blocks],
+        threshold
+    )
+    if not pairs:
+        return result
+
+    matched_left = set()
+    matched_right = set()
+    fuzzy_rows = []
+    for left_index, right_index, similarity in pairs:
+        left_block = left_blocks[left_index]
+        right_block = right_blocks[right_index]
+        left_ids = [token[2] for token in left_block]
+        right_ids = [token[2] for token in right_block]
+        for tag, i1, i2, j1, j2 in diff_engine(left_ids, right_ids):
+            if tag == 'equal':
+                matched_left.update(token[0] for token in left_block[i1:i2])
+                matched_right.update(token[0] for token in right_block[j1:j2])
+
+        fuzzy_rows.append(tuple((left_block[0][0], left_block[-1][1], right_block[0][0], right_block[-1][1], left_ids, right_ids, similarity)))
+
+    fuzzy_rows.sort(key=lambda row: row[0])
+    fuzzy_starts = [row[0] for row in fuzzy_rows]
+
+    def absorbed(row: MovementRow) -> bool:
+        index = bisect_right(fuzzy_starts, row[0]) - 1
+        if index < 0:
+            return False
+        fuzzy_row = fuzzy_rows[index]
+
+        return row[1] <= fuzzy_row[1] and fuzzy_row[2] <= row[2] and row[3] <= fuzzy_row[3]
+
+    rows = [row for row in rows if not absorbed(row)]
+    rows.extend(fuzzy_rows)
+    rows.sort(key=lambda row: row[0])
+
+    return DiffResult(
+        TokenColumns.from_tokens([tuple(token) for token in result.additions if token[0] not in matched_right]),
+        TokenColumns.from_tokens([tuple(token) for token in result.subtractions if token[0] not in matched_left]),
+        MovementColumns.from_rows(rows),
+        result.partial,
+        result.stopped_after
+    )
@@ -1,18 +1,23 @@
-import difflib
+from array import array
+from itertools import compress
+from typing import Union
 
-from matcher.longest_matches import find_best_matching_spans
+from matcher.backends import DEFAULT_BACKEND, Matcher, get_matcher
+from matcher.coverage import Coverage
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, DiffEngine, get_diff_engine
+from text_comparator.diff_result import DiffResult, MovementColumns, TokenColumns
 from tokenizer.context_aware_tokenizer import SpanToken
+from tokenizer.token_stream import TokenStream
 
 
 Span = tuple[int, int]
-SpanMovement = tuple[SpanToken, SpanToken]
 
 
-def get_text_dif_spans(left_input: list, right_input: list) -> tuple[list[Span], list[Span]]:
+def get_text_dif_spans(left_input: list, right_input: list, diff_engine: DiffEngine = get_diff_engine(DEFAULT_DIFF_ENGINE)) -> tuple[list[Span], list[Span]]:
     left = []
     right = []
 
-    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, left_input, right_input).get_opcodes():
+    for tag, i1, i2, j1, j2 in diff_engine(left_input, right_input):
         if tag == 'delete':
             left.append(tuple((i1, i2)))
         elif tag == 'insert':
@@ -27,71 +32,99 @@ def get_text_dif_spans(left_input: list, right_input: list) -> tuple[list[Span],
     return left, right
 
 
-def get_text_deltas(left_tokens: list[SpanToken], right_tokens: list[SpanToken]) -> tuple[list[SpanToken], list[SpanToken], list[SpanMovement]]:
-    left_token_ids = [token[2] for token in left_tokens]
-    right_token_ids = [token[2] for token in right_tokens]
-    left_spans, right_spans = get_text_dif_spans(left_token_ids, right_token_ids)
-    left_tokens_dif = [
-        left_tokens[i]
-        for span in left_spans
-        if span[1] - span[0] > 1
-        for i in range(span[0], span[1])
-    ]
-    right_tokens_dif = [
-        right_tokens[i]
-        for span in right_spans
-        if span[1] - span[0] > 1
-        for i in range(span[0], span[1])
-    ]
-    left_tokens_dif_singles = [
-        left_tokens[i]
-        for span in left_spans
-        if span[1] - span[0] == 1
-        for i in range(span[0], span[1])
-    ]
-    right_tokens_dif_singles = [
-        right_tokens[i]
-        for span in right_spans
-        if span[1] - span[0] == 1
-        for i in range(span[0], span[1])
-    ]
-    left_token_ids_dif = [token[2] for token in left_tokens_dif]
-    right_token_ids_dif = [token[2] for token in right_tokens_dif]
-    matching_spans = find_best_matching_spans(left_token_ids_dif, right_token_ids_dif)
-    subtractions = [
-        token
-        for i, token in enumerate(left_tokens_dif)
-        if not any(
-            span[0] <= i < span[0] + span[2]
-            for span in matching_spans
-        )
-    ]
-    subtractions.extend(left_tokens_dif_singles)
-    subtractions.sort(key=lambda token: token[0])
-    additions = [
-        token
-        for i, token in enumerate(right_tokens_dif)
-        if not any(
-            span[0] <= i < span[0] + span[2]
-            for span in matching_spans
-        )
-    ]
-    additions.extend(right_tokens_dif_singles)
-    additions.sort(key=lambda token: token[0])
-    movements = [
-        tuple((
-            tuple((
-                left_tokens_dif[span[0]][0],
-                left_tokens_dif[span[0] + span[2] - 1][1],
-                [left_tokens_dif[i][2] for i in range(span[0], span[0] + span[2])]
-            )),
-            tuple((
-                right_tokens_dif[span[1]][0],
-                right_tokens_dif[span[1] + span[2] - 1][1],
-                [right_tokens_dif[i][2] for i in range(span[1], span[1] + span[2])]
-            ))
-        ))
-        for span in matching_spans
-    ]
-
-    return additions, subtractions, movements
+def changed_positions(spans: list[Span], coverage: Coverage) -> array:
+    """Indexes of the tokens of the changed spans in order, leaving out positions of multi-token spans claimed by a movement"""
+    changed = array('i')
+    uncovered = coverage.uncovered_mask()
+    position = 0
+    for start, end in spans:
+        if end - start == 1:
+            changed.append(start)
+        elif uncovered.find(0, position, position + end - start) == -1:
+            changed.extend(range(start, end))
+            position += end - start
+        else:
+            changed.extend(compress(range(start, end), uncovered[position:position + end - start]))
+            position += end - start
+
+    return changed
+
+
+def token_stream(tokens: Union[list[SpanToken], TokenStream]) -> TokenStream:
+    return tokens if isinstance(tokens, TokenStream) else TokenStream.over_tokens(tokens)
+
+
+def token_columns(tokens: TokenStream, positions: array) -> TokenColumns:
+    return TokenColumns(
+        array('i', [tokens.starts[position] for position in positions]),
+        array('i', [tokens.ends[position] for position in positions]),
+        array('q', [tokens.token_ids[position] for position in positions])
+    )
+
+
+def get_text_deltas(
+    left_tokens: Union[list[SpanToken], TokenStream],
+    right_tokens: Union[list[SpanToken], TokenStream],
+    matcher: Matcher = get_matcher(DEFAULT_BACKEND),
+    diff_engine: DiffEngine = get_diff_engine(DEFAULT_DIFF_ENGINE)
+) -> DiffResult:
+    """
+    Added, removed and moved tokens of right_tokens against left_tokens. A TokenStream is
+    read column by column, only the token IDs of a list of tuples are copied out.
+    """
+    left = token_stream(left_tokens)
+    right = token_stream(right_tokens)
+    left_token_ids = left.token_ids
+    right_token_ids = right.token_ids
+
+    left_spans = []
+    right_spans = []
+    left_positions_dif = array('i')
+    right_positions_dif = array('i')
+    left_token_ids_dif = array('q')
+    right_token_ids_dif = array('q')
+    for tag, i1, i2, j1, j2 in diff_engine(left_token_ids, right_token_ids):
+        if tag == 'equal':
+            continue
+
+        if i2 > i1:
+            left_spans.append(tuple((i1, i2)))
+            if i2 - i1 > 1:
+                left_positions_dif.extend(range(i1, i2))
+                left_token_ids_dif.extend(left_token_ids[i1:i2])
+
+        if j2 > j1:
+            right_spans.append(tuple((j1, j2)))
+            if j2 - j1 > 1:
+                right_positions_dif.extend(range(j1, j2))
+                right_token_ids_dif.extend(right_token_ids[j1:j2])
+
+    matching_spans = matcher(left_token_ids_dif, right_token_ids_dif)
+
+    left_coverage = Coverage(len(left_positions_dif))
+    left_coverage.add_spans(matching_spans, 0)
+    subtractions = changed_positions(left_spans, left_coverage)
+    right_coverage = Coverage(len(right_positions_dif))
+    right_coverage.add_spans(matching_spans, 1)
+    additions = changed_positions(right_spans, right_coverage)
+
+    lengths = array('i', [span[2] for span in matching_spans])
+    movements = MovementColumns(
+        starts=(
+            array('i', [left.starts[left_positions_dif[span[0]]] for span in matching_spans]),
+            array('i', [right.starts[right_positions_dif[span[1]]] for span in matching_spans])
+        ),
+        ends=(
+            array('i', [left.ends[left_positions_dif[span[0] + span[2] - 1]] for span in matching_spans]),
+            array('i', [right.ends[right_positions_dif[span[1] + span[2] - 1]] for span in matching_spans])
+        ),
+        offsets=(
+            array('i', [span[0] for span in matching_spans]),
+            array('i', [span[1] for span in matching_spans])
+        ),
+        lengths=(lengths, lengths),
+        pools=(left_token_ids_dif, right_token_ids_dif),
+        scores=array('d', [1.0]) * len(matching_spans)
+    )
+
+    return DiffResult(token_columns(right, additions), token_columns(left, subtractions), movements)
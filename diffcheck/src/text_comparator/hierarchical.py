@@ -0,0 +1,152 @@
+import re
+from typing import Union
+
+from matcher.backends import DEFAULT_BACKEND, Matcher, get_matcher
+from matcher.budget import Budget
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, DiffEngine, get_diff_engine
+from text_comparator.diff_result import DiffResult, MovementColumns
+from text_comparator.get_text_diff import get_text_deltas
+from text_comparator.incremental import Tokenize
+from tokenizer.context_aware_tokenizer import SpanToken
+
+
+Segment = tuple[int, int]
+
+PARAGRAPH = re.compile(r'[^\n]*\S[^\n]*')
+SENTENCE = re.compile(r'\S.*?(?:[.!?]+["\')\]]*(?=\s)|$)')
+
+
+def split_paragraphs(text: str) -> list[Segment]:
+    """Character ranges of the non-blank lines"""
+    return [match.span() for match in PARAGRAPH.finditer(text)]
+
+
+def split_sentences(text: str, paragraph: Segment) -> list[Segment]:
+    """Character ranges of the sentences of a paragraph, split after terminal punctuation"""
+    return [match.span() for match in SENTENCE.finditer(text, *paragraph)]
+
+
+def segment_tokens(tokenize: Tokenize, text: str, segment: Segment) -> list[SpanToken]:
+    start, end = segment
+
+    return [
+        (token[0] + start, token[1] + start, token[2])
+        for token in tokenize(text[start:end])
+    ]
+
+
+def unmatched_sentence_tokens(
+    tokenize: Tokenize,
+    text: str,
+    paragraphs: list[Segment],
+    sentences: list[list[Segment]],
+    unmatched: list[Segment]
+) -> list[SpanToken]:
+    """Tokens inside the unmatched sentences, only paragraphs holding one of them are tokenized"""
+    tokens = []
+    position = 0
+    for paragraph, paragraph_sentences in zip(paragraphs, sentences):
+        if position == len(unmatched) or unmatched[position][0] >= paragraph[1]:
+            continue
+
+        for token in segment_tokens(tokenize, text, paragraph):
+            while position < len(unmatched) and unmatched[position][1] <= token[0]:
+                position += 1
+            if position < len(unmatched) and unmatched[position][0] <= token[0]:
+                tokens.append(token)
+
+        while position < len(unmatched) and unmatched[position][0] < paragraph[1]:
+            position += 1
+
+    return tokens
+
+
+def hierarchical_deltas(
+    tokenize: Tokenize,
+    left_text: str,
+    right_text: str,
+    matcher: Matcher = get_matcher(DEFAULT_BACKEND),
+    diff_engine: DiffEngine = get_diff_engine(DEFAULT_DIFF_ENGINE),
+    budget: Union[Budget, None] = None
+) -> DiffResult:
+    """
+    get_text_deltas on texts, narrowed down paragraph by paragraph and then sentence by sentence.
+
+    Paragraphs are aligned by their text. Unaligned paragraphs whose text occurs on both
+    sides are reported as moved blocks after tokenizing them once, they take no part in
+    the token diff. The sentences of the remaining paragraphs are aligned in each changed
+    region, and only the tokens of unaligned sentences go through get_text_deltas.
+    budget, the one matcher spends, is started once those are tokenized.
+    """
+    left_paragraphs = split_paragraphs(left_text)
+    right_paragraphs = split_paragraphs(right_text)
+    left_keys = [left_text[start:end] for start, end in left_paragraphs]
+    right_keys = [right_text[start:end] for start, end in right_paragraphs]
+
+    regions = [
+        tuple((i1, i2, j1, j2))
+        for tag, i1, i2, j1, j2 in diff_engine(left_keys, right_keys)
+        if tag != 'equal'
+    ]
+
+    unmatched_right: dict[str, list[int]] = {}
+    for _, _, j1, j2 in regions:
+        for j in range(j2 - 1, j1 - 1, -1):
+            unmatched_right.setdefault(right_keys[j], []).append(j)
+
+    moved_pairs = []
+    for i1, i2, _, _ in regions:
+        for i in range(i1, i2):
+            candidates = unmatched_right.get(left_keys[i])
+            if candidates:
+                moved_pairs.append(tuple((i, candidates.pop())))
+    moved_left = {i for i, _ in moved_pairs}
+    moved_right = {j for _, j in moved_pairs}
+
+    left_tokens = []
+    right_tokens = []
+    for i1, i2, j1, j2 in regions:
+        region_left = [left_paragraphs[i] for i in range(i1, i2) if i not in moved_left]
+        region_right = [right_paragraphs[j] for j in range(j1, j2) if j not in moved_right]
+        left_sentences = [split_sentences(left_text, paragraph) for paragraph in region_left]
+        right_sentences = [split_sentences(right_text, paragraph) for paragraph in region_right]
+        left_flat = [sentence for sentences in left_sentences for sentence in sentences]
+        right_flat = [sentence for sentences in right_sentences for sentence in sentences]
+
+        left_unmatched = []
+        right_unmatched = []
+        for tag, s1, s2, t1, t2 in diff_engine(
+            [left_text[start:end] for start, end in left_flat],
+            [right_text[start:end] for start, end in right_flat]
+        ):
+            if tag != 'equal':
+                left_unmatched.extend(left_flat[s1:s2])
+                right_unmatched.extend(right_flat[t1:t2])
+
+        left_tokens.extend(unmatched_sentence_tokens(tokenize, left_text, region_left, left_sentences, left_unmatched))
+        right_tokens.extend(unmatched_sentence_tokens(tokenize, right_text, region_right, right_sentences, right_unmatched))
+
+    if budget is not None:
+        budget.start()
+    additions, subtractions, movements = get_text_deltas(left_tokens, right_tokens, matcher, diff_engine)
+    if not moved_pairs:
+        return DiffResult(additions, subtractions, movements)
+
+    rows = movements.rows()
+    for i, j in moved_pairs:
+        paragraph_tokens = segment_tokens(tokenize, left_text, left_paragraphs[i])
+        if paragraph_tokens:
+            shift = right_paragraphs[j][0] - left_paragraphs[i][0]
+            token_ids = [token[2] for token in paragraph_tokens]
+            rows.append(tuple((
+                paragraph_tokens[0][0],
+                paragraph_tokens[-1][1],
+                paragraph_tokens[0][0] + shift,
+                paragraph_tokens[-1][1] + shift,
+                token_ids,
+                token_ids,
+                1.0
+            )))
+    rows.sort(key=lambda row: row[0])
+
+    return DiffResult(additions, subtractions, MovementColumns.from_rows(rows))
@@ -0,0 +1,95 @@
+from functools import partial
+from typing import Union
+
+from text_comparator.myers import MatchingBlock, Region, common_affixes, merge_blocks, myers_region_blocks, split_blocks
+
+
+MAX_CHAIN = 64
+
+
+def find_anchor(
+    left: list,
+    right: list,
+    left_start: int,
+    left_end: int,
+    right_start: int,
+    right_end: int
+) -> Union[MatchingBlock, None]:
+    """
+    Longest common run around the rarest element shared by both regions.
+
+    Elements occurring more than MAX_CHAIN times on the left are never used as anchors.
+    """
+    occurrences: dict = {}
+    for i in range(left_start, left_end):
+        occurrences.setdefault(left[i], []).append(i)
+
+    best = None
+    best_count = MAX_CHAIN + 1
+    best_length = 0
+    j = right_start
+    while j < right_end:
+        positions = occurrences.get(right[j])
+        if positions is None or len(positions) > best_count:
+            j += 1
+            continue
+
+        next_j = j + 1
+        for i in positions:
+            start_i, start_j = i, j
+            while start_i > left_start and start_j > right_start and left[start_i - 1] == right[start_j - 1]:
+                start_i -= 1
+                start_j -= 1
+
+            end_i, end_j = i + 1, j + 1
+            while end_i < left_end and end_j < right_end and left[end_i] == right[end_j]:
+                end_i += 1
+                end_j += 1
+
+            length = end_i - start_i
+            if len(positions) < best_count or length > best_length:
+                best = tuple((start_i, start_j, length))
+                best_count = len(positions)
+                best_length = length
+                next_j = max(next_j, end_j)
+
+        j = next_j
+
+    return best
+
+
+def histogram_split(left: list, right: list, region: Region) -> tuple[list[MatchingBlock], list[Region]]:
+    """Common affixes and anchor of a region, with the regions around the anchor, or its Myers blocks without one"""
+    left_start, left_end, right_start, right_end = region
+    prefix, suffix = common_affixes(left, left_start, left_end, right, right_start, right_end)
+    blocks = [tuple((left_start, right_start, prefix)), tuple((left_end - suffix, right_end - suffix, suffix))]
+    left_start += prefix
+    right_start += prefix
+    left_end -= suffix
+    right_end -= suffix
+
+    if left_start == left_end or right_start == right_end:
+        return blocks, []
+
+    anchor = find_anchor(left, right, left_start, left_end, right_start, right_end)
+    if anchor is None:
+        blocks.extend(myers_region_blocks(left, right, left_start, left_end, right_start, right_end))
+        return blocks, []
+
+    anchor_left, anchor_right, length = anchor
+    blocks.append(anchor)
+
+    return blocks, [
+        tuple((left_start, anchor_left, right_start, anchor_right)),
+        tuple((anchor_left + length, left_end, anchor_right + length, right_end))
+    ]
+
+
+def histogram_matching_blocks(left: list, right: list) -> list[MatchingBlock]:
+    """
+    Histogram difference: anchor on rare shared elements and split around them, regions
+    without a usable anchor fall back to Myers. Matching blocks in difflib's format.
+    """
+    blocks = split_blocks(partial(histogram_split, left, right), [tuple((0, len(left), 0, len(right)))])
+
+    return merge_blocks(blocks, len(left), len(right))
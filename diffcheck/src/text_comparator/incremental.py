@@ -0,0 +1,193 @@
+import re
+import threading
+from bisect import bisect_left
+from typing import Callable, Union
+
+from matcher.backends import DEFAULT_BACKEND, get_matcher
+from matcher.budget import Budget
+from matcher.longest_matches import SpanMatch
+from text_comparator.diff_engines import DEFAULT_DIFF_ENGINE, DiffEngine, OpCode, get_diff_engine
+from text_comparator.diff_result import DiffResult
+from text_comparator.get_text_diff import get_text_deltas
+from tokenizer.context_aware_tokenizer import SpanToken
+from tokenizer.token_stream import TokenStream
+
+
+Tokenize = Callable[[str], Union[list[SpanToken], TokenStream]]
+
+# terminal punctuation and the spaces after it, where edit windows start and end
+SENTENCE_BREAK = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+def changed_range(old_text: str, new_text: str) -> tuple[int, int, int]:
+    """Start of the edit and its end in the old and in the new text, outside of it both texts are equal"""
+    limit = min(len(old_text), len(new_text))
+    start = 0
+    while start < limit and old_text[start] == new_text[start]:
+        start += 1
+
+    suffix = 0
+    while suffix < limit - start and old_text[-suffix - 1] == new_text[-suffix - 1]:
+        suffix += 1
+
+    return start, len(old_text) - suffix, len(new_text) - suffix
+
+
+def edit_window(text: str, start: int, end: int, context: int = 1) -> tuple[int, int]:
+    """
+    Range of text to re-tokenize for an edit of start to end: the sentences it touches and
+    up to context sentences on either side, within the lines it touches
+    """
+    line_start = text.rfind('\n', 0, start) + 1
+    line_end = text.find('\n', end)
+    if line_end == -1:
+        line_end = len(text)
+
+    starts = [line_start, *(match.end() for match in SENTENCE_BREAK.finditer(text, line_start, start))]
+    ends = [*(match.end() for match in SENTENCE_BREAK.finditer(text, end, line_end)), line_end]
+
+    return starts[max(0, len(starts) - 1 - context)], ends[min(context, len(ends) - 1)]
+
+
+def token_window(text: str, tokens: Union[list[SpanToken], TokenStream], start: int, end: int, context: int = 1) -> tuple[int, int]:
+    """
+    edit_window of text widened by whole sentences until no token of text crosses its edges
+    and at least one token before the edit is in it. Rules like JOIN_ATTACHED join a token
+    to the one before it across whitespace, the window has to hold both of them.
+    """
+    token_starts = [token[0] for token in tokens]
+    window_start, window_end = edit_window(text, start, end, context)
+    while True:
+        index = bisect_left(token_starts, window_start)
+        if index and (tokens[index - 1][1] > window_start or index == len(tokens) or tokens[index][0] >= start):
+            window_start = edit_window(text, tokens[index - 1][0], tokens[index - 1][0], 0)[0]
+            continue
+
+        index = bisect_left(token_starts, window_end)
+        if index and tokens[index - 1][1] > window_end:
+            window_end = edit_window(text, tokens[index - 1][1], tokens[index - 1][1], 0)[1]
+            continue
+
+        return window_start, window_end
+
+
+def splice_tokens(
+    tokenize: Tokenize,
+    old_text: str,
+    old_tokens: Union[list[SpanToken], TokenStream],
+    new_text: str,
+    context: int = 1
+) -> Union[list[SpanToken], TokenStream]:
+    """
+    Tokens of new_text, re-tokenizing only the sentences touched by the edit with context
+    sentences around them. A negative context tokenizes new_text whole.
+
+    The window is widened until no token crosses its edges, see token_window, the tokens
+    before it are kept as they are and the tokens after it are shifted by the change in
+    length. spaCy only sees the window, tags near its edges can differ from a parse of
+    the whole text.
+    """
+    if context < 0:
+        return tokenize(new_text)
+
+    start, old_end, new_end = changed_range(old_text, new_text)
+    if start == old_end == new_end:
+        return old_tokens
+
+    window_start, old_window_end = token_window(old_text, old_tokens, start, old_end, context)
+    new_window_end = old_window_end + len(new_text) - len(old_text)
+
+    shift = len(new_text) - len(old_text)
+    tokens = [token for token in old_tokens if token[1] <= window_start]
+    tokens.extend(
+        (token[0] + window_start, token[1] + window_start, token[2])
+        for token in tokenize(new_text[window_start:new_window_end])
+    )
+    tokens.extend(
+        (token[0] + shift, token[1] + shift, token[2])
+        for token in old_tokens
+        if token[0] >= old_window_end
+    )
+
+    return tokens
+
+
+class IncrementalDiff:
+    """
+    Comparison of a fixed left text against a right text that is edited between updates.
+
+    The right text is spliced from the left one on every update, re-tokenizing only the
+    sentences that differ with context sentences on either side, see splice_tokens. Its
+    tokens depend on the two texts alone, not on the earlier updates, and are the ones
+    compare_texts gets for the same pair. When they leave the token IDs as they were, the
+    opcodes and matched spans of the last update are reused and only the offsets of the
+    result move. Whenever the IDs change both are recomputed over the whole sequences,
+    nothing is patched locally: difflib's longest block and the longest-first move
+    selection depend on the whole sequence, so an opcode list patched around the edit
+    would not match a full comparison.
+
+    update changes the state of the comparison, callers sharing one hold its lock.
+    """
+    tokenize: Tokenize
+    backend: str
+    diff_engine: DiffEngine
+    context: int
+    left_text: str
+    left_tokens: Union[list[SpanToken], TokenStream]
+    left_token_ids: list
+    right_text: str
+    right_tokens: Union[list[SpanToken], TokenStream]
+    right_token_ids: list
+    opcodes: list[OpCode]
+    matching_spans: Union[list[SpanMatch], None]
+    budget: Budget
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        tokenize: Tokenize,
+        left_text: str,
+        backend: str = DEFAULT_BACKEND,
+        diff_engine: DiffEngine = get_diff_engine(DEFAULT_DIFF_ENGINE),
+        context: int = 1
+    ):
+        self.tokenize = tokenize
+        self.backend = backend
+        self.diff_engine = diff_engine
+        self.context = context
+        self.left_text = left_text
+        self.left_tokens = tokenize(left_text)
+        self.left_token_ids = [token[2] for token in self.left_tokens]
+        self.right_text = left_text
+        self.right_tokens = self.left_tokens
+        self.right_token_ids = self.left_token_ids
+        self.opcodes = diff_engine(self.left_token_ids, self.right_token_ids)
+        self.matching_spans = None
+        self.budget = Budget()
+        self.lock = threading.Lock()
+
+    def update(self, right_text: str, budget: Union[Budget, None] = None) -> DiffResult:
+        """Result for right_text, budget is started once it is tokenized and only spent if moves are matched again"""
+        right_tokens = splice_tokens(self.tokenize, self.left_text, self.left_tokens, right_text, self.context)
+        right_token_ids = [token[2] for token in right_tokens]
+        if right_token_ids != self.right_token_ids:
+            self.opcodes = self.diff_engine(self.left_token_ids, right_token_ids)
+            self.matching_spans = None
+
+        self.right_text = right_text
+        self.right_tokens = right_tokens
+        self.right_token_ids = right_token_ids
+
+        def match(left_token_ids_dif: list, right_token_ids_dif: list) -> list[SpanMatch]:
+            if self.matching_spans is None:
+                if budget is not None:
+                    budget.start()
+                matcher = get_matcher(self.backend, budget=budget)
+                self.matching_spans = matcher(left_token_ids_dif, right_token_ids_dif)
+                self.budget = Budget() if budget is None else budget
+
+            return self.matching_spans
+
+        result = get_text_deltas(self.left_tokens, right_tokens, match, lambda left, right: self.opcodes)
+
+        return result.budgeted(self.budget)
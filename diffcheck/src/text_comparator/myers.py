@@ -0,0 +1,169 @@
+import difflib
+from functools import partial
+from typing import Callable, Union
+
+
+MatchingBlock = tuple[int, int, int]
+# (left start, left end, right start, right end)
+Region = tuple[int, int, int, int]
+# matching blocks found in a region and the regions left to search around them
+Split = Callable[[Region], tuple[list[MatchingBlock], list[Region]]]
+
+# rounds of the middle snake search before a region is handed to difflib, every round
+# costs up to two more edits, so low-diversity regions don't take quadratic time
+MAX_COST = 512
+
+
+def middle_snake(
+    left: list,
+    left_start: int,
+    left_end: int,
+    right: list,
+    right_start: int,
+    right_end: int,
+    max_cost: int = MAX_COST
+) -> Union[tuple[int, int, int, int], None]:
+    """
+    Myers' middle snake, searched forward and backward at once in linear space.
+
+    Returns the start and end of the snake relative to the region, (x, y, u, v), or
+    None when the search rounds run past max_cost.
+    """
+    n = left_end - left_start
+    m = right_end - right_start
+    delta = n - m
+    odd = delta & 1
+    offset = (n + m + 1) // 2 + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(offset):
+        if d > max_cost:
+            return None
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x = x
+            while x < n and y < m and left[left_start + x] == right[right_start + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[offset + delta - k] >= n:
+                return start_x, start_x - k, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x = x
+            while x < n and y < m and left[left_end - 1 - x] == right[right_end - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return n - x, m - y, n - start_x, m - (start_x - k)
+
+    raise AssertionError('no middle snake')
+
+
+def common_affixes(
+    left: list,
+    left_start: int,
+    left_end: int,
+    right: list,
+    right_start: int,
+    right_end: int
+) -> tuple[int, int]:
+    """Lengths of the common prefix and the common suffix of two regions"""
+    prefix = 0
+    while left_start + prefix < left_end and right_start + prefix < right_end and left[left_start + prefix] == right[right_start + prefix]:
+        prefix += 1
+
+    suffix = 0
+    while left_end - suffix > left_start + prefix and right_end - suffix > right_start + prefix and left[left_end - suffix - 1] == right[right_end - suffix - 1]:
+        suffix += 1
+
+    return prefix, suffix
+
+
+def merge_blocks(blocks: list[MatchingBlock], left_length: int, right_length: int) -> list[MatchingBlock]:
+    """Sort, join adjacent blocks and end with difflib's (len(left), len(right), 0) sentinel"""
+    merged = []
+    for block in sorted(block for block in blocks if block[2] > 0):
+        if merged and merged[-1][0] + merged[-1][2] == block[0] and merged[-1][1] + merged[-1][2] == block[1]:
+            merged[-1] = tuple((merged[-1][0], merged[-1][1], merged[-1][2] + block[2]))
+        else:
+            merged.append(block)
+
+    merged.append(tuple((left_length, right_length, 0)))
+
+    return merged
+
+
+def split_blocks(split: Split, regions: list[Region]) -> list[MatchingBlock]:
+    """Matching blocks of regions, each split into the blocks found in it and the regions left around them until none are left, unsorted"""
+    blocks = []
+    regions = list(regions)
+    while regions:
+        found, remaining = split(regions.pop())
+        blocks.extend(found)
+        regions.extend(remaining)
+
+    return blocks
+
+
+def myers_split(left: list, right: list, region: Region) -> tuple[list[MatchingBlock], list[Region]]:
+    """
+    Common affixes and middle snake of a region, with the regions before and after the
+    snake. A region whose snake is not found within MAX_COST rounds gets difflib's
+    matching blocks instead, which autojunk keeps fast on low-diversity input.
+    """
+    left_start, left_end, right_start, right_end = region
+    prefix, suffix = common_affixes(left, left_start, left_end, right, right_start, right_end)
+    blocks = [tuple((left_start, right_start, prefix)), tuple((left_end - suffix, right_end - suffix, suffix))]
+    left_start += prefix
+    right_start += prefix
+    left_end -= suffix
+    right_end -= suffix
+
+    if left_start == left_end or right_start == right_end:
+        return blocks, []
+
+    snake = middle_snake(left, left_start, left_end, right, right_start, right_end, MAX_COST)
+    if snake is None:
+        matcher = difflib.SequenceMatcher(None, left[left_start:left_end], right[right_start:right_end])
+        blocks.extend(tuple((left_start + i, right_start + j, size)) for i, j, size in matcher.get_matching_blocks())
+        return blocks, []
+
+    x, y, u, v = snake
+    blocks.append(tuple((left_start + x, right_start + y, u - x)))
+
+    return blocks, [
+        tuple((left_start, left_start + x, right_start, right_start + y)),
+        tuple((left_start + u, left_end, right_start + v, right_end))
+    ]
+
+
+def myers_region_blocks(
+    left: list,
+    right: list,
+    left_start: int,
+    left_end: int,
+    right_start: int,
+    right_end: int
+) -> list[MatchingBlock]:
+    """Matching blocks of a shortest edit script between two regions, unsorted"""
+    return split_blocks(partial(myers_split, left, right), [tuple((left_start, left_end, right_start, right_end))])
+
+
+def myers_matching_blocks(left: list, right: list) -> list[MatchingBlock]:
+    """O(ND) difference, matching blocks in the format of difflib's get_matching_blocks"""
+    return merge_blocks(myers_region_blocks(left, right, 0, len(left), 0, len(right)), len(left), len(right))
@@ -0,0 +1,25 @@
+"""
+Writes tokenizer.json next to spm.model so DebertaTokenizer loads the fast tokenizer
+directly instead of converting the sentencepiece model on every start.
+
+PYTHONPATH=src python -m tokenizer.build_fast_tokenizer
+"""
+import logging
+
+from transformers import DebertaV2TokenizerFast
+
+from tokenizer.deberta_tokenizer import MODEL_DIR
+
+
+def build_fast_tokenizer():
+    logger = logging.getLogger(__name__)
+
+    tokenizer = DebertaV2TokenizerFast.from_pretrained(str(MODEL_DIR), local_files_only=True)
+    tokenizer.backend_tokenizer.save(str(MODEL_DIR / 'tokenizer.json'))
+
+    logger.info(f"Wrote {MODEL_DIR / 'tokenizer.json'}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    build_fast_tokenizer()
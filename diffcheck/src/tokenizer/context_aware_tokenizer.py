@@ -1,11 +1,23 @@
+import hashlib
 import logging
-from typing import Union
+import re
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, Union
 
+import spacy
 from spacy import Language
 from spacy.language import PipeCallable
-from spacy.tokens import Token
+from spacy.tokens import Doc, Token
 
-from tokenizer.deberta_tokenizer import DebertaTokenizer
+from tokenizer import rule_engine
+from tokenizer.deberta_tokenizer import DebertaToken, DebertaTokenizer
+from tokenizer.interning import ID_BITS, TokenInterner
+from tokenizer.spacy_tokenizer import provided_attributes
+from tokenizer.sub_token_cache import SubTokenCache
+from tokenizer.token_cache import TokenCache
+from tokenizer.token_stream import TokenStream
 
 
 # don't combine dashes, just leave them separate
@@ -16,6 +28,12 @@ from tokenizer.deberta_tokenizer import DebertaTokenizer
 
 SpanToken = tuple[int, int, Union[int, list[int]]]
 
+# a line with the line breaks after it, the chunks of a text concatenate back to it
+PARAGRAPH = re.compile(r'[^\n]+\n*|\n+')
+
+# bump whenever the rules in tokenize change what they return, it is part of the cache version
+RULES_VERSION = 2
+
 
 class TokenizerError(Exception):
     """Custom exception for tokenizer errors"""
@@ -26,6 +44,10 @@ class ContextAwareTokenizer:
     logger: logging.Logger
     spacy_tokenizer: Language
     deberta_tokenizer: DebertaTokenizer
+    sub_token_cache: SubTokenCache
+    interner: TokenInterner
+    token_cache: Union[TokenCache, None]
+    paragraph_granular: bool
     # transformer: PipeCallable
 
     def __init__(self, deberta_tokenizer: DebertaTokenizer, spacy_tokenizer: Language):
@@ -33,60 +55,90 @@ class ContextAwareTokenizer:
 
         self.deberta_tokenizer = deberta_tokenizer
         self.spacy_tokenizer = spacy_tokenizer
+        if isinstance(spacy_tokenizer, Language):
+            missing = set(rule_engine.ATTRIBUTES) - provided_attributes(spacy_tokenizer)
+            if missing:
+                raise TokenizerError(f"The spaCy pipeline ({', '.join(spacy_tokenizer.pipe_names)}) does not set {', '.join(sorted(missing))}, which the rules read")
+        self.sub_token_cache = SubTokenCache(spacy_tokenizer)
+        self.interner = TokenInterner()
+        self.token_cache = None
+        self.paragraph_granular = False
         # self.transformer = self.spacy_tokenizer.get_pipe("transformer")
 
+    def version(self) -> str:
+        """Everything the tokens of a text depend on besides the text, for the token cache key"""
+        meta = self.spacy_tokenizer.meta
+        parts = [
+            f"rules={RULES_VERSION}",
+            f"ids={ID_BITS}",
+            f"spacy={spacy.__version__}",
+            f"model={meta.get('name')}-{meta.get('version')}",
+            f"pipes={','.join(self.spacy_tokenizer.pipe_names)}",
+            f"deberta={self.deberta_tokenizer.fingerprint()}"
+        ]
+
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    def cached(self, text: str) -> Union[TokenStream, None]:
+        """Tokens of text from the token cache, their texts are interned again for reports"""
+        if self.token_cache is None:
+            return None
+        tokens = self.token_cache.get(text)
+        if tokens is not None:
+            self.interner.update({token[2]: text[token[0]:token[1]].lower() for token in tokens})
+
+        return tokens
+
+    def tokenize_paragraphs(self, text: str) -> TokenStream:
+        """
+        tokenize of each paragraph on its own, cached with offsets relative to the paragraph
+        and moved to where it sits in text, so an edit only parses the paragraphs it touches.
+
+        spaCy tags and parses each paragraph without the ones around it, which can change the
+        pos and dep the rules read near paragraph starts and ends, see
+        benchmark/bench_paragraph_tokens.py for how often that happens.
+        """
+        paragraphs = [match.span() for match in PARAGRAPH.finditer(text)]
+        paragraphs_tokens = self.pipe_tokens(text[start:end] for start, end in paragraphs)
+
+        tokens = TokenStream(array('i'), array('i'), array('q'), array('B'), array('B'))
+        for (start, _), paragraph_tokens in zip(paragraphs, paragraphs_tokens):
+            tokens.starts.extend(token_start + start for token_start in paragraph_tokens.starts)
+            tokens.ends.extend(token_end + start for token_end in paragraph_tokens.ends)
+            tokens.token_ids.extend(paragraph_tokens.token_ids)
+            tokens.pos.extend(paragraph_tokens.pos)
+            tokens.dep.extend(paragraph_tokens.dep)
+
+        return tokens
+
     def to_text(self, word_id: int) -> str:
         """Convert tokens back to text"""
-        return self.deberta_tokenizer.tokenizer.convert_ids_to_tokens(word_id)
+        return self.interner.text(word_id)
+
+    @staticmethod
+    def first_overlaps(spacy_tokens, deberta_offsets) -> list[int]:
+        """Index of the first spaCy token overlapping each DeBERTa offset, -1 if none does"""
+        return rule_engine.first_overlaps(
+            [token.idx for token in spacy_tokens],
+            [token.idx + len(token.text) for token in spacy_tokens],
+            deberta_offsets
+        )
 
     @staticmethod
     def map_deberta_to_spacy(tokens, offsets) -> list[list[Token]]:
-        token_mapping: list[list[Token]] = [[] for _ in range(len(offsets))]
-        for j, (deberta_start, deberta_end) in enumerate(offsets):
-            for token in tokens:
-                spacy_start = token.idx
-                spacy_end = token.idx + len(token.text)
-                if spacy_start < deberta_end and spacy_end > deberta_start:
-                    token_mapping[j].append(token)
-                    break
-        return token_mapping
+        return [
+            [tokens[i]] if i != -1 else []
+            for i in ContextAwareTokenizer.first_overlaps(tokens, offsets)
+        ]
 
     @staticmethod
     def map_spacy_to_deberta(spacy_tokens, deberta_offsets) -> list[list]:
         token_mapping: list[list] = [[] for i in range(len(spacy_tokens))]
-        for j, deberta_offset in enumerate(deberta_offsets):
-            for i, token in enumerate(spacy_tokens):
-                spacy_start = token.idx
-                spacy_end = token.idx + len(token.text)
-                if spacy_start < deberta_offset[1] and spacy_end > deberta_offset[0]:
-                    token_mapping[i].append(deberta_offset)
-                    break
+        for deberta_offset, i in zip(deberta_offsets, ContextAwareTokenizer.first_overlaps(spacy_tokens, deberta_offsets)):
+            if i != -1:
+                token_mapping[i].append(deberta_offset)
         return token_mapping
 
-    @staticmethod
-    def are_neighbors(left, right):
-        if isinstance(left, Token):
-            if isinstance(right, Token):
-                return left.idx + len(left.text) == right.idx
-            else:
-                return left.idx + len(left.text) == right[0]
-        elif isinstance(right, Token):
-            return left[1] == right.idx
-        else:
-            return left[1] == right[0]
-
-    @staticmethod
-    def join_tokens(left, right, deberta_tokens, pos='JOINED', dep=None):
-        return left[0], right.idx + len(right.text), left[2] + ''.join(deberta_token[2] for deberta_token in deberta_tokens), pos, dep
-
-    @staticmethod
-    def join_tokens_sequence(spacy_tokens, deberta_tokens, pos, dep) -> tuple[int, int, str, str, Union[str, None]]:
-        """Join a sequence of tokens together, preserving necessary information."""
-        start_pos = spacy_tokens[0].idx
-        end_pos = spacy_tokens[-1].idx + len(spacy_tokens[-1].text)
-        text = ''.join(deberta_token[2] for deberta_token in deberta_tokens)
-        return start_pos, end_pos, text, pos, dep
-
     # def analyze_compound(self, doc, token) -> bool:
     #     """
     #     Determine if compound is compositional using transformer embeddings
@@ -118,139 +170,85 @@ class ContextAwareTokenizer:
     #     # print(f'{similarity} > 0.494')
     #     return similarity > 0.494  # Return True if compositional
 
-    def tokenize(self, text: str) -> list[SpanToken]:
+    def tokenize_many(self, texts: Iterable[str], batch_size: int = 32, n_process: int = 1) -> Iterator[TokenStream]:
+        """
+        tokenize of every text, yielded in input order while texts is still being read. The
+        texts missing from the token cache are parsed by nlp.pipe in batches of batch_size
+        over n_process processes, and each batch is encoded by DeBERTa in one call.
+        """
+        if self.paragraph_granular:
+            for text in texts:
+                yield self.tokenize(text)
+            return
+
+        yield from self.pipe_tokens(texts, batch_size, n_process)
+
+    def pipe_tokens(self, texts: Iterable[str], batch_size: int = 32, n_process: int = 1) -> Iterator[TokenStream]:
+        # texts nlp.pipe has read, with their cached tokens or None, in input order
+        pending = deque()
+
+        def misses() -> Iterator[str]:
+            for text in texts:
+                if not isinstance(text, str):
+                    raise TokenizerError(f"Input must be string, not {type(text)}")
+                cached_tokens = self.cached(text) if text else TokenStream.from_tokens([])
+                pending.append(tuple((text, cached_tokens)))
+                if cached_tokens is None:
+                    yield text
+
+        docs = iter(self.spacy_tokenizer.pipe(misses(), batch_size=batch_size, n_process=n_process))
+        while True:
+            batch_docs = list(islice(docs, batch_size))
+            if not batch_docs:
+                break
+
+            batch_texts = []
+            order = []
+            while len(batch_texts) < len(batch_docs):
+                text, cached_tokens = pending.popleft()
+                if cached_tokens is None:
+                    batch_texts.append(text)
+                order.append(cached_tokens)
+
+            encoded = self.deberta_tokenizer.encode_batch(batch_texts)
+            parsed = iter([
+                self.rule_tokens(text, doc, deberta_tokens)
+                for text, doc, deberta_tokens in zip(batch_texts, batch_docs, encoded)
+            ])
+            for cached_tokens in order:
+                yield next(parsed) if cached_tokens is None else cached_tokens
+
+        # the texts after the last one parsed were all cached
+        while pending:
+            yield pending.popleft()[1]
+
+    def tokenize(self, text: str, deberta_tokens: Union[list[DebertaToken], None] = None) -> TokenStream:
         """Context-aware tokenization using DeBERTa and spaCy's analysis."""
         if not isinstance(text, str):
             raise TokenizerError(f"Input must be string, not {type(text)}")
 
         if not text:
-            return []
-
-        # print('Input: ', text)
-        spacy_tokens = self.spacy_tokenizer(text)
-        deberta_output = self.deberta_tokenizer.tokenizer(text, return_offsets_mapping=True)
-        deberta_offsets = deberta_output['offset_mapping'][1:-1]
-        deberta_tokens = self.deberta_tokenizer.tokenizer.tokenize(text)
-        deberta_offsets = [
-            (start + 1 if deberta_tokens[i].startswith('▁') and end - start > 1 else start, end)
-            for i, (start, end) in enumerate(deberta_offsets)
-        ]
-        deberta_tokens = [
-            (*deberta_offsets[i], token)
-            for i, token in enumerate(deberta_tokens)
-        ]
-        spacy_to_deberta = ContextAwareTokenizer.map_spacy_to_deberta(spacy_tokens, deberta_tokens)
-
-        tokens = []
-        i = 0
-        while i < len(spacy_tokens):
-            token = spacy_tokens[i]
-            deberta_tokens = spacy_to_deberta[i]
-            pos = token.pos_
-            dep = token.dep_
-            tag = token.tag_
-            head = token.head
-            # print(deberta_tokens)
-            # print(f'{token.text} {pos} {dep} {tag} {head} {len(deberta_tokens)}')
-
-            # if token.dep_ == "compound":
-            #     # is_compositional = self.analyze_compound(spacy_tokens, token)
-            #     # if not is_compositional:
-            #     #     print('COMPOUND RULE')
-            #     #     # Lexical compound - join with head
-            #     head = token.head
-            #     compound_tokens = [token, head]
-            #     all_deberta = []
-            #     for t in compound_tokens:
-            #         all_deberta.extend(spacy_to_deberta[t.i])
-            #     tokens.append(self.join_tokens_sequence(
-            #         compound_tokens,
-            #         all_deberta,
-            #         'NOUN',
-            #         None
-            #     ))
-            #     i = head.i + 1  # Skip past the head token
-            #     continue
-
-            if token.pos_ in {'PRON'} and len(deberta_tokens) > 1:
-                # print('RULE 1: SPLIT')
-                for deberta_token in deberta_tokens:
-                    new_token = self.spacy_tokenizer(deberta_token[2])[-1]
-                    tokens.append((*deberta_token, new_token.pos_, new_token.dep_))
-                i += 1
-                continue
-
-            if token.pos_ == 'SPACE':
-                # print('RULE 2: IGNORE')
-                i += 1
-                continue
-
-            if token.text in {'_', '▁'}:
-                # print('RULE 3: JOIN')
-                if len(tokens) > 0 and tokens[-1][3] not in {'PUNCT', 'SPACE'} and ContextAwareTokenizer.are_neighbors(tokens[-1], token):
-                    if tokens[-1][3] == 'UNDERSCORE':
-                        tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], token, deberta_tokens, 'UNDERSCORE', None)
-                    else:
-                        tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], token, deberta_tokens, 'NOUN', None)
-                else:
-                    tokens.append((token.idx, token.idx + len(token.text), ''.join(deberta_token[2] for deberta_token in deberta_tokens), 'UNDERSCORE', None))
-
-                if i < len(spacy_tokens) - 1 and spacy_tokens[i + 1].pos_ not in {'PUNCT', 'SPACE'} and ContextAwareTokenizer.are_neighbors(tokens[-1], spacy_tokens[i + 1]):
-                    tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], spacy_tokens[i + 1], spacy_to_deberta[i + 1], 'NOUN', None)
-                    i += 1
-
-                i += 1
-                continue
-
-            if token.pos_ in {'AUX', 'PART'} and len(deberta_tokens) > 1:
-                # print('AUX RULE')
-                tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], token, deberta_tokens)
-                i += 1
-                continue
-
-            # if len(tokens) > 0 and i < len(spacy_tokens) - 1 and token.pos_ == 'PUNCT' and tokens[-1][3] == 'PROPN' and spacy_tokens[i + 1].pos_ == 'PROPN' and ContextAwareTokenizer.neighbors(tokens[-1], token) and ContextAwareTokenizer.neighbors(token, spacy_tokens[i + 1]):
-            #     print('RULE 4: JOIN')
-            #     tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], token, deberta_tokens, 'PROPN')
-            #     i += 1
-            #     continue
-
-            if len(tokens) > 0 and tokens[-1][3] not in {'PUNCT', 'SPACE'} and token.pos_ not in {'PUNCT', 'SPACE'} and ContextAwareTokenizer.are_neighbors(tokens[-1], token):
-                # print('RULE 5: JOIN')
-                token_type = token.pos_ if token.pos_ == tokens[-1][3] else 'JOINED'
-                tokens[-1] = ContextAwareTokenizer.join_tokens(tokens[-1], token, deberta_tokens, token_type, None)
-                i += 1
-                continue
-
-            # print('APPENDING NEW TOKEN')
-            tokens.append((token.idx, token.idx + len(token.text), ''.join(deberta_token[2] for deberta_token in deberta_tokens), pos, dep))
-
-            i += 1
-
-        tokens = [
-            token
-            for token in tokens
-            if token[3] not in {'UNDERSCORE', 'PUNCT', 'DET'} and (token[3] != 'CCONJ' or token[4] != 'cc')
-        ]
+            return TokenStream.from_tokens([])
 
-        # print(tokens)
+        if deberta_tokens is None and self.paragraph_granular:
+            return self.tokenize_paragraphs(text)
 
-        token_text = [
-            text[token[0]:token[1]].lower()
-            for token in tokens
-        ]
-        token_ids = self.deberta_tokenizer.tokenizer.convert_tokens_to_ids(token_text)
-        unknown_tokens = [
-            token_text[i]
-            for i, token_id in enumerate(token_ids)
-            if token_id == self.deberta_tokenizer.unknown_token_id
-        ]
-        self.deberta_tokenizer.tokenizer.add_tokens(unknown_tokens)
-        token_ids = self.deberta_tokenizer.tokenizer.convert_tokens_to_ids(token_text)
-        tokens = [
-            (token[0], token[1], token_ids[i])
-            for i, token in enumerate(tokens)
-        ]
-        # print(tokens)
+        if deberta_tokens is None:
+            cached_tokens = self.cached(text)
+            if cached_tokens is not None:
+                return cached_tokens
+            deberta_tokens = self.deberta_tokenizer.encode(text)
+
+        return self.rule_tokens(text, self.spacy_tokenizer(text), deberta_tokens)
+
+    def rule_tokens(self, text: str, doc: Doc, deberta_tokens: list[DebertaToken]) -> TokenStream:
+        """Interned tokens of the rules over a parse of text, on the columns they come in, stored in the token cache"""
+        starts, ends, pos, dep = rule_engine.apply_rules(doc, deberta_tokens, self.sub_token_cache.analyze)
+        token_ids = array('q', self.interner.intern(text[start:end].lower() for start, end in zip(starts, ends)))
+        tokens = TokenStream(starts, ends, token_ids, pos, dep)
+
+        if self.token_cache is not None:
+            self.token_cache.put(text, tokens)
 
         return tokens
 
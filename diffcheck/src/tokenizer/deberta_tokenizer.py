@@ -1,27 +1,35 @@
+import hashlib
 import logging
 from logging import Logger
 from pathlib import Path
 
+from tokenizers import Encoding
+
 from transformers import DebertaV2TokenizerFast, DebertaV2Model
 
 
+MODEL_DIR = Path.home() / '.cache' / 'tokenizer_models' / 'microsoft-deberta-v3-xsmall'
+
+# (start, end, token), offsets of tokens starting with ▁ leave out the space it stands for
+DebertaToken = tuple[int, int, str]
+
+
 class DebertaTokenizer:
     logger: Logger
     # model: DebertaV2Model
     tokenizer: DebertaV2TokenizerFast
-    unknown_token_id: int
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        cache_dir = Path.home() / '.cache' / 'tokenizer_models'
-        model_dir = cache_dir / 'microsoft-deberta-v3-xsmall'
+        model_dir = MODEL_DIR
+        if not (model_dir / 'tokenizer.json').exists():
+            self.logger.warning(f"No tokenizer.json in {model_dir}, converting spm.model on every start, run python -m tokenizer.build_fast_tokenizer")
 
         try:
             self.tokenizer = DebertaV2TokenizerFast.from_pretrained(
                 str(model_dir),
                 local_files_only=True,
-                trust_remote_code=True,
-                use_fast=False
+                trust_remote_code=True
             )
 
             # try:
@@ -63,6 +71,26 @@ class DebertaTokenizer:
             self.logger.error(f"Error initializing tokenizer: {e}")
             raise
 
-        self.unknown_token_id = self.tokenizer.convert_tokens_to_ids(self.tokenizer.unk_token)
-
         self.logger.info(f"Initialized with DeBERTa=microsoft-deberta-v3-xsmall")
+
+    def fingerprint(self) -> str:
+        """Hash of the serialized tokenizer, changes with the vocabulary, normalizer or pre-tokenizer"""
+        return hashlib.sha256(self.tokenizer.backend_tokenizer.to_str().encode()).hexdigest()
+
+    @staticmethod
+    def to_tokens(encoding: Encoding) -> list[DebertaToken]:
+        return [
+            (start + 1 if token.startswith('▁') and end - start > 1 else start, end, token)
+            for token, (start, end) in zip(encoding.tokens, encoding.offsets)
+        ]
+
+    def encode(self, text: str) -> list[DebertaToken]:
+        """Tokens and offsets from a single pass of the fast tokenizer"""
+        return DebertaTokenizer.to_tokens(self.tokenizer.backend_tokenizer.encode(text, add_special_tokens=False))
+
+    def encode_batch(self, texts: list[str]) -> list[list[DebertaToken]]:
+        """encode of every text, the batch is split across the tokenizer's threads"""
+        return [
+            DebertaTokenizer.to_tokens(encoding)
+            for encoding in self.tokenizer.backend_tokenizer.encode_batch(texts, add_special_tokens=False)
+        ]
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+
+# token IDs are the low ID_BITS bits of a blake2b hash, signed 64-bit array('q') and NumPy columns hold them
+ID_BITS = 63
+ID_MASK = (1 << ID_BITS) - 1
+
+
+class TokenIdCollision(Exception):
+    """Two words held by a TokenInterner hash to the same ID"""
+    pass
+
+
+class TokenInterner:
+    """
+    Token IDs derived from a hash of the token text, so every process gives a word the
+    same ID without sharing state. IDs fit in 63 bits for the array('q') and NumPy
+    columns downstream. The texts of the most recently interned IDs are kept, up to
+    maxsize of them, to render reports.
+
+    An ID is the hash of its word and nothing else. A word whose hash is held by another
+    word raises TokenIdCollision instead of being moved to another ID, which would depend
+    on what the process had interned before.
+    """
+    maxsize: int
+    texts: OrderedDict
+    lock: threading.Lock
+
+    def __init__(self, maxsize: int = 1 << 20):
+        self.maxsize = maxsize
+        self.texts = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def token_id(text: str) -> int:
+        return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little') & ID_MASK
+
+    def add(self, token_id: int, text: str):
+        known = self.texts.setdefault(token_id, text)
+        if known != text:
+            raise TokenIdCollision(f"{text!r} and {known!r} both hash to {token_id}")
+        self.texts.move_to_end(token_id)
+
+    def intern(self, texts: Iterable[str]) -> list[int]:
+        token_ids = []
+        with self.lock:
+            for text in texts:
+                token_id = TokenInterner.token_id(text)
+                self.add(token_id, text)
+                token_ids.append(token_id)
+
+            while len(self.texts) > self.maxsize:
+                self.texts.popitem(last=False)
+
+        return token_ids
+
+    def text(self, token_id: int) -> str:
+        """Text of an interned ID, IDs evicted since are shown by number"""
+        return self.texts.get(token_id, f'<{token_id}>')
+
+    def export(self, token_ids: Iterable[int]) -> dict[int, str]:
+        """Texts of token_ids, for update in another process"""
+        return {token_id: self.texts[token_id] for token_id in token_ids if token_id in self.texts}
+
+    def update(self, entries: dict[int, str]):
+        with self.lock:
+            for token_id, text in entries.items():
+                self.add(token_id, text)
+
+            while len(self.texts) > self.maxsize:
+                self.texts.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'size': len(self.texts), 'maxsize': self.maxsize}
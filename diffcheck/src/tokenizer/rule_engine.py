@@ -0,0 +1,188 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Sequence
+
+import numpy as np
+from spacy.attrs import IDS as SPACY_ATTRIBUTE_IDS
+from spacy.parts_of_speech import IDS as SPACY_POS_IDS
+from spacy.tokens import Doc
+
+from tokenizer.deberta_tokenizer import DebertaToken
+from tokenizer.sub_token_cache import SubTokenAnalysis
+from tokenizer.token_stream import DEP_LABELS, POS_CODES, dep_code, pos_code
+
+
+# attributes apply_rules reads from doc.to_array, in column order
+COLUMNS = ('pos', 'dep', 'idx', 'length')
+# token attributes apply_rules and the sub-token analysis read, the spaCy pipeline has to set them, text for _ and ▁
+ATTRIBUTES = (*COLUMNS, 'text')
+
+# (starts, ends, pos codes, dep codes) of the tokens the rules keep
+RuleColumns = tuple[array, array, array, array]
+Analyze = Callable[[list[str]], dict[str, SubTokenAnalysis]]
+
+# classes of spaCy tokens, each token gets the first that applies in this order
+SPLIT, SKIP, UNDERSCORE, ATTACH, PUNCT, WORD = range(6)
+# states, by the pos of the open token: none yet, PUNCT or SPACE, UNDERSCORE, any other
+EMPTY, BLOCKING, UNDERSCORED, OPEN = range(4)
+# actions
+SPLIT_SUB_TOKENS, IGNORE, NEW_UNDERSCORE, JOIN_UNDERSCORE, JOIN_ATTACHED, APPEND, JOIN_NEIGHBOR = range(7)
+
+# action of each class in each state, rows by class and columns by state
+RULES = (
+    (SPLIT_SUB_TOKENS,) * 4,                                        # PRON of several DeBERTa tokens
+    (IGNORE,) * 4,                                                  # SPACE
+    (NEW_UNDERSCORE, NEW_UNDERSCORE, JOIN_UNDERSCORE, JOIN_UNDERSCORE),  # _ and ▁
+    (APPEND, JOIN_ATTACHED, JOIN_ATTACHED, JOIN_ATTACHED),          # AUX and PART of several DeBERTa tokens
+    (APPEND,) * 4,                                                  # PUNCT
+    (APPEND, APPEND, JOIN_NEIGHBOR, JOIN_NEIGHBOR),                 # anything else
+)
+
+NOUN_CODE = POS_CODES['NOUN']
+JOINED_CODE = POS_CODES['JOINED']
+UNDERSCORE_CODE = POS_CODES['UNDERSCORE']
+PUNCT_CODE = POS_CODES['PUNCT']
+SPACE_CODE = POS_CODES['SPACE']
+CCONJ_CODE = POS_CODES['CCONJ']
+CC_CODE = dep_code('cc')
+
+STATES = [OPEN] * len(POS_CODES)
+STATES[PUNCT_CODE] = BLOCKING
+STATES[SPACE_CODE] = BLOCKING
+STATES[UNDERSCORE_CODE] = UNDERSCORED
+
+# pos codes of the tokens left out of the output, CCONJ is only left out as a cc
+DROPPED = [False] * len(POS_CODES)
+for label in ('UNDERSCORE', 'PUNCT', 'DET'):
+    DROPPED[POS_CODES[label]] = True
+
+# spaCy's pos symbol IDs to pos codes
+POS_SYMBOL_CODES = np.zeros(max(SPACY_POS_IDS.values()) + 1, dtype=np.uint8)
+for label, symbol in SPACY_POS_IDS.items():
+    POS_SYMBOL_CODES[symbol] = pos_code(label)
+
+
+def first_overlaps(spacy_starts: Sequence[int], spacy_ends: Sequence[int], deberta_offsets) -> list[int]:
+    """
+    Index of the first spaCy token overlapping each DeBERTa offset, -1 if none does.
+
+    Both streams are sorted by character offset, so a single pointer walks the spaCy
+    tokens: the first token ending after an offset's start is the only candidate,
+    every earlier token ends before it and every later one starts after it.
+    """
+    overlaps = []
+    i = 0
+    previous_start = 0
+    for deberta_offset in deberta_offsets:
+        deberta_start, deberta_end = deberta_offset[0], deberta_offset[1]
+        if deberta_start < previous_start:
+            i = bisect_right(spacy_ends, deberta_start)
+        previous_start = deberta_start
+
+        while i < len(spacy_ends) and spacy_ends[i] <= deberta_start:
+            i += 1
+        overlaps.append(i if i < len(spacy_starts) and spacy_starts[i] < deberta_end else -1)
+
+    return overlaps
+
+
+def dep_codes(doc: Doc, dep_ids: np.ndarray) -> list[int]:
+    codes = {doc.vocab.strings[label]: code for code, label in enumerate(DEP_LABELS) if label}
+
+    return [codes.get(dep_id, 0) for dep_id in dep_ids.tolist()]
+
+
+def apply_rules(doc: Doc, deberta_tokens: list[DebertaToken], analyze: Analyze) -> RuleColumns:
+    """
+    The tokenizer rules over the attribute arrays of doc: PRON of several DeBERTa tokens
+    are split into them, SPACE is ignored, _ and ▁ join their neighbors into a NOUN, AUX
+    and PART of several DeBERTa tokens join the token before them and touching tokens
+    join unless either is PUNCT or SPACE. Only the last token can still be joined, so it
+    is filtered as soon as the next one starts, leaving out UNDERSCORE, PUNCT, DET and
+    CCONJ cc.
+    """
+    attributes = doc.to_array([SPACY_ATTRIBUTE_IDS[name.upper()] for name in COLUMNS]).reshape(-1, len(COLUMNS)).astype(np.int64, copy=False)
+    count = len(attributes)
+    pos_column = POS_SYMBOL_CODES[attributes[:, 0]]
+    starts_column = attributes[:, 2]
+    ends_column = starts_column + attributes[:, 3]
+    text = doc.text
+
+    overlaps = np.array(first_overlaps(starts_column.tolist(), ends_column.tolist(), deberta_tokens), dtype=np.int64)
+    several = np.bincount(overlaps[overlaps >= 0], minlength=count)[:count] > 1
+
+    classes = np.full(count, WORD, dtype=np.uint8)
+    classes[pos_column == PUNCT_CODE] = PUNCT
+    classes[several & np.isin(pos_column, (POS_CODES['AUX'], POS_CODES['PART']))] = ATTACH
+    underscores = (attributes[:, 3] == 1) & np.array([text[start] in '_▁' for start in starts_column.tolist()], dtype=bool)
+    classes[underscores] = UNDERSCORE
+    classes[pos_column == SPACE_CODE] = SKIP
+    classes[several & (pos_column == POS_CODES['PRON'])] = SPLIT
+
+    sub_tokens = {}
+    for deberta_token, overlap in zip(deberta_tokens, overlaps.tolist()):
+        if overlap != -1 and classes[overlap] == SPLIT:
+            sub_tokens.setdefault(overlap, []).append(deberta_token)
+    analyses = analyze([deberta_token[2] for split_tokens in sub_tokens.values() for deberta_token in split_tokens])
+
+    classes = classes.tolist()
+    pos_codes = pos_column.tolist()
+    dep_codes_ = dep_codes(doc, attributes[:, 1])
+    starts = starts_column.tolist()
+    ends = ends_column.tolist()
+
+    kept = tuple((array('i'), array('i'), array('B'), array('B')))
+    kept_starts, kept_ends, kept_pos, kept_dep = kept
+    open_start = open_end = open_pos = open_dep = 0
+    state = EMPTY
+
+    def close():
+        if state != EMPTY and not DROPPED[open_pos] and not (open_pos == CCONJ_CODE and open_dep == CC_CODE):
+            kept_starts.append(open_start)
+            kept_ends.append(open_end)
+            kept_pos.append(open_pos)
+            kept_dep.append(open_dep)
+
+    i = 0
+    while i < count:
+        action = RULES[classes[i]][state]
+
+        if action == IGNORE:
+            i += 1
+            continue
+
+        if action == SPLIT_SUB_TOKENS:
+            for deberta_token in sub_tokens[i]:
+                close()
+                sub_pos, sub_dep = analyses[deberta_token[2]]
+                open_start, open_end, open_pos, open_dep = deberta_token[0], deberta_token[1], pos_code(sub_pos), dep_code(sub_dep)
+                state = STATES[open_pos]
+            i += 1
+            continue
+
+        if action == JOIN_ATTACHED:
+            open_end, open_pos, open_dep = ends[i], JOINED_CODE, 0
+        elif action == JOIN_NEIGHBOR and open_end == starts[i]:
+            open_end, open_pos, open_dep = ends[i], pos_codes[i] if pos_codes[i] == open_pos else JOINED_CODE, 0
+        elif action == JOIN_UNDERSCORE and open_end == starts[i]:
+            open_end, open_pos, open_dep = ends[i], UNDERSCORE_CODE if state == UNDERSCORED else NOUN_CODE, 0
+        elif action == NEW_UNDERSCORE or action == JOIN_UNDERSCORE:
+            close()
+            open_start, open_end, open_pos, open_dep = starts[i], ends[i], UNDERSCORE_CODE, 0
+        else:
+            close()
+            open_start, open_end, open_pos, open_dep = starts[i], ends[i], pos_codes[i], dep_codes_[i]
+        state = STATES[open_pos]
+
+        if action == NEW_UNDERSCORE or action == JOIN_UNDERSCORE:
+            following = i + 1
+            if following < count and pos_codes[following] != PUNCT_CODE and pos_codes[following] != SPACE_CODE and open_end == starts[following]:
+                open_end, open_pos, open_dep = ends[following], NOUN_CODE, 0
+                state = OPEN
+                i += 1
+
+        i += 1
+
+    close()
+
+    return kept
@@ -1,13 +1,63 @@
 import logging
 
 import spacy
+from spacy import Language
 
 
-def spacy_tokenizer():
+# attributes each en_core_web_sm component sets and the components it reads from
+COMPONENTS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    'tok2vec': ((), ()),
+    'tagger': (('tag',), ('tok2vec',)),
+    'parser': (('dep', 'head', 'sent_start'), ('tok2vec',)),
+    'senter': (('sent_start',), ()),
+    # maps the tags to pos
+    'attribute_ruler': (('pos',), ('tagger',)),
+    'lemmatizer': (('lemma',), ('attribute_ruler',)),
+    'ner': (('ent_type', 'ent_iob'), ()),
+}
+# attributes the tokenizer sets before any component runs
+TOKENIZER_ATTRIBUTES = ('text', 'idx', 'length', 'orth', 'whitespace')
+
+# attributes each profile loads components for, every other component is left out
+PROFILES: dict[str, tuple[str, ...]] = {
+    'full': tuple(attribute for attributes, _ in COMPONENTS.values() for attribute in attributes),
+    # what ContextAwareTokenizer's rules read
+    'rules': ('pos', 'dep'),
+}
+DEFAULT_PROFILE = 'rules'
+
+
+def profile_components(profile: str) -> list[str]:
+    """Components that set the attributes of profile, with the components they read from"""
+    try:
+        attributes = PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown spaCy profile: {profile}") from None
+
+    needed = [name for name, (assigned, _) in COMPONENTS.items() if set(assigned) & set(attributes)]
+    # needed grows while it is walked, so the sources of sources are added too
+    for name in needed:
+        needed.extend(source for source in COMPONENTS[name][1] if source not in needed)
+
+    return [name for name in COMPONENTS if name in needed]
+
+
+def provided_attributes(nlp: Language) -> set[str]:
+    """Attributes set on the tokens of a Doc of nlp by its tokenizer and enabled components"""
+    provided = set(TOKENIZER_ATTRIBUTES)
+    for name in nlp.pipe_names:
+        provided.update(COMPONENTS.get(name, ((), ()))[0])
+
+    return provided
+
+
+def spacy_tokenizer(profile: str = DEFAULT_PROFILE):
     logger = logging.getLogger(__name__)
+    components = profile_components(profile)
 
     try:
-        tokenizer = spacy.load('en_core_web_sm')
+        tokenizer = spacy.load('en_core_web_sm', exclude=[name for name in COMPONENTS if name not in components])
+        logger.info(f"Loaded en_core_web_sm for the {profile} profile with {', '.join(tokenizer.pipe_names)}")
         return tokenizer
     except Exception as e:
         logger.error(f"Error initializing tokenizer: {e}")
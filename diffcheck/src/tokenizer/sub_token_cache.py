@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+from spacy import Language
+
+
+SubTokenAnalysis = tuple[str, str]
+
+
+class SubTokenCache:
+    """
+    Bounded LRU of DeBERTa sub-token text to the (pos, dep) spaCy gives it as a one-word
+    text. Misses are analyzed together in one nlp.pipe call.
+    """
+    nlp: Language
+    maxsize: int
+    entries: OrderedDict
+    hits: int
+    misses: int
+    lock: threading.Lock
+
+    def __init__(self, nlp: Language, maxsize: int = 4096):
+        self.nlp = nlp
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def analyze(self, texts: list[str]) -> dict[str, SubTokenAnalysis]:
+        """(pos, dep) of the last token of each text, a repeated text is a hit after the first"""
+        analyses = {}
+        misses = []
+        with self.lock:
+            for text in texts:
+                if text in analyses:
+                    self.hits += 1
+                elif text in self.entries:
+                    self.entries.move_to_end(text)
+                    analyses[text] = self.entries[text]
+                    self.hits += 1
+                else:
+                    analyses[text] = None
+                    misses.append(text)
+                    self.misses += 1
+
+        if not misses:
+            return analyses
+
+        for text, doc in zip(misses, self.nlp.pipe(misses)):
+            analyses[text] = tuple((doc[-1].pos_, doc[-1].dep_))
+
+        with self.lock:
+            for text in misses:
+                self.entries[text] = analyses[text]
+                self.entries.move_to_end(text)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+        return analyses
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Union
+
+from tokenizer.token_stream import TokenStream
+
+# bytes held per entry on top of its packed tokens, keys and bookkeeping
+ENTRY_OVERHEAD = 128
+# array types of the starts, ends, token IDs, pos and dep columns, packed one after the other
+COLUMN_TYPES = ('i', 'i', 'q', 'B', 'B')
+TOKEN_BYTES = sum(array(typecode).itemsize for typecode in COLUMN_TYPES)
+
+
+def pack_tokens(tokens: TokenStream) -> bytes:
+    return b''.join(array(typecode, column).tobytes() for typecode, column in zip(COLUMN_TYPES, tokens.columns()))
+
+
+def unpack_tokens(packed: bytes) -> TokenStream:
+    count = len(packed) // TOKEN_BYTES
+    columns = []
+    offset = 0
+    for typecode in COLUMN_TYPES:
+        column = array(typecode)
+        column.frombytes(packed[offset:offset + count * column.itemsize])
+        offset += count * column.itemsize
+        columns.append(column)
+
+    return TokenStream(*columns)
+
+
+class TokenCache:
+    """
+    TokenStreams of whole texts keyed by a hash of the text and of the tokenizer version,
+    stored as their packed columns.
+
+    The in-process tier is an LRU holding up to max_bytes of packed tokens. With a path,
+    misses fall through to an SQLite file every process can share, entries written by
+    another tokenizer version are deleted when it is opened.
+    """
+    logger: logging.Logger
+    version: str
+    max_bytes: int
+    path: Union[Path, None]
+    entries: OrderedDict
+    size: int
+    hits: int
+    disk_hits: int
+    misses: int
+    log_every: int
+    lock: threading.Lock
+    connection: Union[sqlite3.Connection, None]
+    connection_pid: int
+
+    def __init__(self, version: str, max_bytes: int = 64 << 20, path: Union[str, Path, None] = None, log_every: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.version = version
+        self.max_bytes = max_bytes
+        self.path = None if path is None else Path(path)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.log_every = log_every
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_pid = -1
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(self.version.encode() + b'\0' + text.encode()).digest()
+
+    def database(self) -> sqlite3.Connection:
+        """Connection of this process, a forked worker opens its own"""
+        if self.connection is None or self.connection_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS tokens (key BLOB PRIMARY KEY, version TEXT NOT NULL, tokens BLOB NOT NULL)')
+            self.connection.execute('DELETE FROM tokens WHERE version != ?', (self.version,))
+            self.connection_pid = os.getpid()
+
+        return self.connection
+
+    def get(self, text: str) -> Union[TokenStream, None]:
+        key = self.key(text)
+        with self.lock:
+            packed = self.entries.get(key)
+            if packed is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif self.path is not None:
+                row = self.database().execute('SELECT tokens FROM tokens WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    packed = row[0]
+                    self.remember(key, packed)
+                    self.disk_hits += 1
+
+            if packed is None:
+                self.misses += 1
+            if (self.hits + self.disk_hits + self.misses) % self.log_every == 0:
+                self.logger.info(f"Token cache: {self.stats()}")
+
+        return None if packed is None else unpack_tokens(packed)
+
+    def put(self, text: str, tokens: TokenStream):
+        key = self.key(text)
+        packed = pack_tokens(tokens)
+        with self.lock:
+            self.remember(key, packed)
+            if self.path is not None:
+                self.database().execute(
+                    'INSERT OR REPLACE INTO tokens (key, version, tokens) VALUES (?, ?, ?)',
+                    (key, self.version, packed)
+                )
+
+    def remember(self, key: bytes, packed: bytes):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous) + ENTRY_OVERHEAD
+        self.entries[key] = packed
+        self.size += len(packed) + ENTRY_OVERHEAD
+
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted) + ENTRY_OVERHEAD
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes
+        }
@@ -0,0 +1,138 @@
+from array import array
+from typing import Iterable, Iterator, Sequence, Union
+
+import numpy as np
+
+
+# code 0 is a missing label, JOINED and UNDERSCORE are the pos the tokenizer rules give joined tokens
+POS_LABELS = (
+    '', 'ADJ', 'ADP', 'ADV', 'AUX', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN',
+    'PUNCT', 'SCONJ', 'SYM', 'VERB', 'X', 'SPACE', 'JOINED', 'UNDERSCORE', 'CONJ', 'EOL'
+)
+DEP_LABELS = (
+    '', 'ROOT', 'acl', 'acomp', 'advcl', 'advmod', 'agent', 'amod', 'appos', 'attr', 'aux', 'auxpass',
+    'case', 'cc', 'ccomp', 'compound', 'conj', 'csubj', 'csubjpass', 'dative', 'dep', 'det', 'dobj',
+    'expl', 'intj', 'mark', 'meta', 'neg', 'nmod', 'npadvmod', 'nsubj', 'nsubjpass', 'nummod', 'oprd',
+    'parataxis', 'pcomp', 'pobj', 'poss', 'preconj', 'predet', 'prep', 'prt', 'punct', 'quantmod',
+    'relcl', 'xcomp'
+)
+POS_CODES = {label: code for code, label in enumerate(POS_LABELS)}
+DEP_CODES = {label: code for code, label in enumerate(DEP_LABELS)}
+
+
+def pos_code(label: Union[str, None]) -> int:
+    return POS_CODES.get(label or '', 0)
+
+
+def dep_code(label: Union[str, None]) -> int:
+    return DEP_CODES.get(label or '', 0)
+
+
+class TupleField:
+    """One field of a list of token tuples, read in place as a column"""
+    __slots__ = ('tokens', 'field')
+    tokens: Sequence[tuple]
+    field: int
+
+    def __init__(self, tokens: Sequence[tuple], field: int):
+        self.tokens = tokens
+        self.field = field
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, list[int]]:
+        if isinstance(index, slice):
+            return [token[self.field] for token in self.tokens[index]]
+
+        return self.tokens[index][self.field]
+
+    def __iter__(self) -> Iterator[int]:
+        return (token[self.field] for token in self.tokens)
+
+
+class TokenStream:
+    """
+    Tokens stored as parallel start, end and token ID columns with pos and dep codes,
+    indexes like a list of (start, end, token_id) tuples.
+
+    A slice shares the array columns of the stream it was taken from through memoryviews,
+    so a stream can no longer grow once a slice of it exists. Other columns, a TupleField
+    or a list, are sliced by copying.
+    """
+    __slots__ = ('starts', 'ends', 'token_ids', 'pos', 'dep')
+    starts: Sequence[int]
+    ends: Sequence[int]
+    token_ids: Sequence[int]
+    pos: Sequence[int]
+    dep: Sequence[int]
+
+    def __init__(
+        self,
+        starts: Sequence[int],
+        ends: Sequence[int],
+        token_ids: Sequence[int],
+        pos: Union[Sequence[int], None] = None,
+        dep: Union[Sequence[int], None] = None
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.token_ids = token_ids
+        self.pos = array('B', bytes(len(token_ids))) if pos is None else pos
+        self.dep = array('B', bytes(len(token_ids))) if dep is None else dep
+
+    @staticmethod
+    def over_tokens(tokens: Sequence[tuple]) -> 'TokenStream':
+        """
+        Stream reading the starts and ends of a list of (start, end, token_id) tuples in
+        place, for callers that only look up a few of them. Only the token IDs are copied,
+        into a list, which the diff engines read faster than an array.
+        """
+        return TokenStream(TupleField(tokens, 0), TupleField(tokens, 1), [token[2] for token in tokens])
+
+    @staticmethod
+    def from_tokens(tokens: Iterable[tuple]) -> 'TokenStream':
+        """Stream of (start, end, token_id) tuples, pos and dep are read from a fourth and fifth field when present"""
+        fields = list(zip(*tokens)) or [(), (), ()]
+        starts, ends, token_ids = fields[:3]
+        pos = array('B', map(pos_code, fields[3])) if len(fields) > 3 else None
+        dep = array('B', map(dep_code, fields[4])) if len(fields) > 4 else None
+
+        return TokenStream(array('i', starts), array('i', ends), array('q', token_ids), pos, dep)
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[tuple[int, int, int], 'TokenStream']:
+        if isinstance(index, slice):
+            return TokenStream(*(
+                memoryview(column)[index] if isinstance(column, (array, memoryview)) else column[index]
+                for column in self.columns()
+            ))
+
+        return tuple((self.starts[index], self.ends[index], self.token_ids[index]))
+
+    def __iter__(self) -> Iterator[tuple[int, int, int]]:
+        return zip(self.starts, self.ends, self.token_ids)
+
+    def __eq__(self, other) -> bool:
+        return len(self) == len(other) and all(token == tuple(other_token) for token, other_token in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f'TokenStream({list(self)!r})'
+
+    def columns(self) -> tuple[Sequence[int], ...]:
+        return self.starts, self.ends, self.token_ids, self.pos, self.dep
+
+    def tokens(self) -> list[tuple[int, int, int]]:
+        return list(self)
+
+    def pos_labels(self) -> list[str]:
+        return [POS_LABELS[code] for code in self.pos]
+
+    def dep_labels(self) -> list[str]:
+        return [DEP_LABELS[code] for code in self.dep]
+
+    def numpy(self) -> tuple[np.ndarray, ...]:
+        """Columns as NumPy arrays sharing the stream's memory"""
+        return tuple(np.asarray(column) for column in self.columns())
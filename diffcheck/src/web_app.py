@@ -1,5 +1,8 @@
-from flask import Flask, render_template, request, jsonify
-from main import generate_diff_report
+import json
+
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from main import ChainSummary, compare_chain, compare_edited, compare_revisions, render_report, tokenizer
+from text_comparator.diff_result import DiffResult
 
 app = Flask(__name__)
 
@@ -7,14 +10,56 @@ app = Flask(__name__)
 def index():
     return render_template('index.html')
 
+def summarize(result: DiffResult) -> dict:
+    return {
+        'report': render_report(result),
+        'added': len(result.additions),
+        'removed': len(result.subtractions),
+        'moved': len(result.movements),
+        'partial': result.partial
+    }
+
 @app.route('/compare', methods=['POST'])
 def compare():
     data = request.get_json()
     left_text = data.get('left_text', '')
     right_text = data.get('right_text', '')
     
-    report = generate_diff_report(left_text, right_text)
-    return jsonify({'report': report})
+    return jsonify(summarize(compare_edited(left_text, right_text)))
+
+@app.route('/compare/multi', methods=['POST'])
+def compare_multi():
+    data = request.get_json()
+    base_text = data.get('base_text', '')
+    revision_texts = data.get('revision_texts', [])
+
+    results, seconds = compare_revisions(base_text, revision_texts)
+    return jsonify({
+        'reports': [summarize(result) for result in results],
+        'seconds': seconds
+    })
+
+@app.route('/compare/chain', methods=['POST'])
+def compare_versions():
+    data = request.get_json()
+    version_texts = data.get('version_texts', [])
+
+    def generate():
+        summary = ChainSummary()
+        for step, result in enumerate(compare_chain(version_texts), start=1):
+            summary.add(result)
+            yield json.dumps({'step': step, **summarize(result)}) + '\n'
+        yield json.dumps({'summary': summary.to_dict()}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'sub_token_cache': tokenizer.sub_token_cache.stats(),
+        'interner': tokenizer.interner.stats(),
+        'token_cache': None if tokenizer.token_cache is None else tokenizer.token_cache.stats()
+    })
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -1,6 +1,52 @@
+import re
+from typing import Callable, Union
+
 import pytest
 
 def pytest_configure(config):
     config.addinivalue_line(
         "markers", "unit: mark test as a unit test"
     )
+
+
+@pytest.fixture
+def span_tokens() -> Callable[[list[int]], list[tuple[int, int, int]]]:
+    """Tokens of token IDs, one every two characters"""
+    def span_tokens(token_ids: list[int]) -> list[tuple[int, int, int]]:
+        return [tuple((index * 2, index * 2 + 1, token_id)) for index, token_id in enumerate(token_ids)]
+
+    return span_tokens
+
+
+@pytest.fixture
+def as_tuples() -> Callable:
+    """A DiffResult as lists of token and movement tuples, to compare results"""
+    def as_tuples(result) -> tuple[list, list, list]:
+        additions, subtractions, movements = result
+
+        return (
+            [tuple(token) for token in additions],
+            [tuple(token) for token in subtractions],
+            [tuple((tuple(movement[0]), tuple(movement[1]))) for movement in movements]
+        )
+
+    return as_tuples
+
+
+@pytest.fixture
+def word_tokenizer() -> Callable:
+    """Tokenizers splitting at whitespace, every text they are called with is added to calls"""
+    def word_tokenizer(calls: Union[list[str], None] = None) -> Callable[[str], list[tuple[int, int, int]]]:
+        token_ids = {}
+
+        def tokenize(text: str) -> list[tuple[int, int, int]]:
+            if calls is not None:
+                calls.append(text)
+            return [
+                tuple((word.start(), word.end(), token_ids.setdefault(word.group(), len(token_ids))))
+                for word in re.finditer(r'\S+', text)
+            ]
+
+        return tokenize
+
+    return word_tokenizer
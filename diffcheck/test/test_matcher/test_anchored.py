@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from matcher.anchored import find_anchored_blocks, find_anchored_matching_spans
+from matcher.longest_matches import find_best_matching_spans
+
+
+@pytest.mark.unit
+def test_token_match():
+    left = [1, 2, 3, 4, 5, 6, 7, 8]
+    right = [5, 6, 7, 8, 3, 4, 1, 2]
+
+    assert find_anchored_matching_spans(left, right, k=2, min_length=2) == find_best_matching_spans(left, right)
+
+
+@pytest.mark.unit
+def test_short_blocks_ignored():
+    left = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    right = [7, 8, 9, 1, 2, 3, 4, 5, 6]
+
+    assert find_anchored_matching_spans(left, right, k=3, min_length=4) == [(0, 3, 6)]
+    assert find_anchored_matching_spans(left, right, k=3, min_length=3) == [(0, 3, 6), (6, 0, 3)]
+
+
+@pytest.mark.unit
+def test_overlapping_block_trimmed():
+    left = [1, 2, 3, 4, 5, 6, 7]
+    right = [9, 3, 4, 5, 6, 7, 9, 1, 2, 3, 4]
+
+    assert find_anchored_matching_spans(left, right, k=2, min_length=2) == [(0, 7, 2), (2, 1, 5)]
+    assert find_anchored_matching_spans(left, right, k=2, min_length=3) == [(2, 1, 5)]
+
+
+@pytest.mark.unit
+def test_min_length_below_k():
+    with pytest.raises(ValueError):
+        find_anchored_matching_spans([1, 2], [1, 2], k=4, min_length=2)
+
+
+@pytest.mark.unit
+def test_moved_blocks():
+    generator = random.Random(0)
+    for _ in range(50):
+        paragraphs = [[generator.randrange(10000) for _ in range(generator.randint(5, 20))] for _ in range(30)]
+        left = [token for paragraph in paragraphs for token in paragraph]
+        generator.shuffle(paragraphs)
+        right = [token for paragraph in paragraphs for token in paragraph]
+
+        spans = find_anchored_matching_spans(left, right)
+
+        assert sum(span[2] for span in spans) == len(left)
+        for span in spans:
+            assert left[span[0]:span[0] + span[2]] == right[span[1]:span[1] + span[2]]
+
+
+@pytest.mark.unit
+def test_blocks_are_maximal():
+    generator = random.Random(1)
+    for _ in range(200):
+        left = [generator.randint(0, 3) for _ in range(30)]
+        right = [generator.randint(0, 3) for _ in range(30)]
+
+        expected = sorted(
+            (i, j, length)
+            for i in range(len(left))
+            for j in range(len(right))
+            if (i == 0 or j == 0 or left[i - 1] != right[j - 1])
+            for length in [next(
+                (n for n in range(min(len(left) - i, len(right) - j)) if left[i + n] != right[j + n]),
+                min(len(left) - i, len(right) - j)
+            )]
+            if length >= 3
+        )
+
+        assert sorted(find_anchored_blocks(left, right, 3)) == expected
@@ -0,0 +1,98 @@
+import random
+import tracemalloc
+
+import pytest
+
+from matcher.backends import SPAN_FINDERS
+from matcher.longest_matches import find_best_matching_spans, find_matching_spans
+from matcher.vectorized import BLOCK_MEMORY, find_vectorized_spans
+
+
+BACKENDS = [backend for backend in SPAN_FINDERS if backend != 'reference']
+
+
+def random_pair(seed: int) -> tuple[list[int], list[int]]:
+    generator = random.Random(seed)
+    alphabet = generator.randint(1, 6)
+    left = [generator.randint(0, alphabet) for _ in range(generator.randint(0, 40))]
+    right = [generator.randint(0, alphabet) for _ in range(generator.randint(0, 40))]
+
+    return left, right
+
+
+def moved_blocks(seed: int) -> tuple[list[int], list[int]]:
+    generator = random.Random(seed)
+    blocks = [
+        [generator.randint(0, 50) for _ in range(generator.randint(1, 12))]
+        for _ in range(20)
+    ]
+    left = [token for block in blocks for token in block]
+    generator.shuffle(blocks)
+    right = [token for block in blocks for token in block]
+
+    return left, right
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_same_candidates(backend):
+    for seed in range(500):
+        left, right = random_pair(seed)
+        assert SPAN_FINDERS[backend](left, right) == find_matching_spans(left, right), (left, right)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_same_best_spans(backend):
+    for seed in range(200):
+        for left, right in (random_pair(seed), moved_blocks(seed)):
+            expected = find_best_matching_spans(left, right)
+            assert find_best_matching_spans(left, right, SPAN_FINDERS[backend]) == expected, (left, right)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_token_match(backend):
+    left = [1, 2, 3, 4, 5, 6, 7, 8]
+    right = [5, 6, 7, 8, 3, 4, 1, 2]
+
+    assert find_best_matching_spans(left, right, SPAN_FINDERS[backend]) == [(0, 6, 2), (2, 4, 2), (4, 0, 4)]
+
+
+@pytest.mark.unit
+def test_vectorized_blocks():
+    for seed in range(200):
+        left, right = random_pair(seed)
+        assert find_vectorized_spans(left, right, block_pairs=7) == find_matching_spans(left, right), (left, right)
+
+
+@pytest.mark.unit
+def test_vectorized_memory_bounded():
+    # about half a million equal pairs over an eight word vocabulary
+    generator = random.Random(0)
+    left = [generator.randrange(8) for _ in range(2000)]
+    right = [generator.randrange(8) for _ in range(2000)]
+
+    tracemalloc.start()
+    try:
+        spans = find_vectorized_spans(left, right)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(spans) > 0
+    assert peak - retained <= BLOCK_MEMORY
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('backend', SPAN_FINDERS)
+def test_spans_match_tokens(backend):
+    for seed in range(300):
+        for left, right in (random_pair(seed), moved_blocks(seed)):
+            left_covered = set()
+            right_covered = set()
+            for i, j, n in find_best_matching_spans(left, right, SPAN_FINDERS[backend]):
+                assert n > 1 and left[i:i + n] == right[j:j + n], (left, right, (i, j, n))
+                assert left_covered.isdisjoint(range(i, i + n)) and right_covered.isdisjoint(range(j, j + n))
+                left_covered.update(range(i, i + n))
+                right_covered.update(range(j, j + n))
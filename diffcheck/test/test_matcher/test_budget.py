@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from matcher.anchored import find_anchored_matching_spans
+from matcher.backends import SPAN_FINDERS
+from matcher.budget import Budget
+from matcher.longest_matches import find_best_matching_spans
+from matcher.vectorized import find_vectorized_spans
+
+
+LEFT = [3, 5, 1, 1, 1, 2, 4]
+RIGHT = [3, 4, 4, 3, 5, 1, 2, 4]
+
+
+@pytest.mark.unit
+def test_unlimited_budget():
+    budget = Budget(seconds=60, work=10_000)
+
+    assert find_best_matching_spans(LEFT, RIGHT, find_vectorized_spans, budget) == find_best_matching_spans(LEFT, RIGHT)
+    assert not budget.exhausted
+
+
+@pytest.mark.unit
+def test_partial_rounds():
+    budget = Budget(work=1)
+
+    complete = find_best_matching_spans(LEFT, RIGHT, find_vectorized_spans)
+    partial = find_best_matching_spans(LEFT, RIGHT, find_vectorized_spans, budget)
+
+    assert budget.exhausted
+    assert partial == [(4, 5, 3)]
+    assert complete == [(0, 3, 2), (4, 5, 3)]
+
+
+@pytest.mark.unit
+def test_expired_deadline():
+    budget = Budget(seconds=0)
+
+    assert find_best_matching_spans(LEFT, RIGHT, find_vectorized_spans, budget) == []
+    assert budget.exhausted
+
+
+@pytest.mark.unit
+def test_anchored_partial():
+    left = list(range(100))
+    right = list(range(50, 100)) + list(range(50))
+    budget = Budget(work=1)
+
+    assert find_anchored_matching_spans(left, right, budget=budget) == [(0, 50, 50)]
+    assert budget.exhausted
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('backend', SPAN_FINDERS)
+def test_first_round_bounded(backend):
+    left = [0, 1] * 200
+    right = [1, 0] * 200
+    budget = Budget(work=1)
+
+    spans = SPAN_FINDERS[backend](left, right, budget)
+
+    assert budget.exhausted
+    assert 0 < len(spans) < len(SPAN_FINDERS[backend](left, right))
+    assert find_best_matching_spans(left, right, SPAN_FINDERS[backend], Budget(work=1))
+
+
+@pytest.mark.unit
+def test_stopped_after():
+    budget = Budget(seconds=0)
+
+    assert budget.stopped_after is None
+    assert budget.expired()
+    assert 0 <= budget.stopped_after < 1
+
+
+@pytest.mark.unit
+def test_started_over():
+    budget = Budget(seconds=0.05, work=1)
+    budget.spend()
+    time.sleep(0.1)
+    assert budget.expired()
+
+    budget.start()
+
+    assert not budget.exhausted and budget.spent == 0
+    assert not budget.expired()
@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from matcher.fuzzy import find_fuzzy_pairs, minhash_signatures, shingles
+
+
+@pytest.mark.unit
+def test_signature_agreement():
+    generator = random.Random(0)
+    block = [generator.randrange(1000) for _ in range(200)]
+    edited = [token if index % 20 else 5000 + index for index, token in enumerate(block)]
+    unrelated = [generator.randrange(1000) for _ in range(200)]
+
+    signatures = minhash_signatures([shingles(block), shingles(edited), shingles(unrelated)], permutations=256)
+
+    assert (signatures[0] == signatures[1]).mean() > 0.6
+    assert (signatures[0] == signatures[2]).mean() < 0.1
+
+
+@pytest.mark.unit
+def test_pairs():
+    generator = random.Random(1)
+    left = [[generator.randrange(1000) for _ in range(30)] for _ in range(5)]
+    right = [list(block) for block in reversed(left)]
+    right[0][10] = 2000
+    right.append([generator.randrange(1000) for _ in range(30)])
+
+    pairs = find_fuzzy_pairs(left, right)
+
+    assert sorted((left_index, right_index) for left_index, right_index, _ in pairs) == [(0, 4), (1, 3), (2, 2), (3, 1), (4, 0)]
+    assert [similarity for left_index, _, similarity in pairs if left_index == 4][0] < 1
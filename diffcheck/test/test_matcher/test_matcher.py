@@ -17,10 +17,7 @@ def tokenizer():
 
 @pytest.fixture
 def text_tokens(tokenizer):
-    return lambda tokens: [
-        tokenizer.deberta_tokenizer.tokenizer.convert_ids_to_tokens(token[2])
-        for token in tokens
-    ]
+    return lambda tokens: [tokenizer.to_text(token[2]) for token in tokens]
 
 
 @pytest.fixture
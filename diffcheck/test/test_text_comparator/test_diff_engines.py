@@ -0,0 +1,99 @@
+import random
+import time
+
+import pytest
+
+from text_comparator import myers
+from text_comparator.diff_engines import DIFF_ENGINES
+from text_comparator.get_text_diff import get_text_dif_spans
+from text_comparator.myers import middle_snake
+
+
+def longest_common_subsequence(left: list, right: list) -> int:
+    previous = [0] * (len(right) + 1)
+    for element in left:
+        current = [0]
+        for j, other in enumerate(right):
+            current.append(previous[j] + 1 if element == other else max(previous[j + 1], current[j]))
+        previous = current
+
+    return previous[-1]
+
+
+def apply_opcodes(opcodes: list, left: list, right: list) -> int:
+    """Checks the opcodes rewrite left into right, returns the number of kept elements"""
+    i = j = kept = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert left[i1:i2] == right[j1:j2]
+            kept += i2 - i1
+        i, j = i2, j2
+
+    assert (i, j) == (len(left), len(right))
+
+    return kept
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('engine', DIFF_ENGINES)
+def test_valid_opcodes(engine):
+    generator = random.Random(0)
+    for _ in range(500):
+        alphabet = generator.randint(1, 8)
+        left = [generator.randint(0, alphabet) for _ in range(generator.randint(0, 30))]
+        right = [generator.randint(0, alphabet) for _ in range(generator.randint(0, 30))]
+
+        apply_opcodes(DIFF_ENGINES[engine](left, right), left, right)
+
+
+@pytest.mark.unit
+def test_myers_is_minimal():
+    generator = random.Random(1)
+    for _ in range(500):
+        left = [generator.randint(0, 4) for _ in range(generator.randint(0, 30))]
+        right = [generator.randint(0, 4) for _ in range(generator.randint(0, 30))]
+
+        assert apply_opcodes(DIFF_ENGINES['myers'](left, right), left, right) == longest_common_subsequence(left, right)
+
+
+@pytest.mark.unit
+def test_middle_snake_gives_up_past_max_cost():
+    left = [0, 1] * 20
+    right = [1, 0] * 20
+
+    assert middle_snake(left, 0, len(left), right, 0, len(right), max_cost=0) is None
+    assert middle_snake(left, 0, len(left), right, 0, len(right)) is not None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('engine', ['myers', 'histogram'])
+def test_low_diversity_bounded(engine, monkeypatch):
+    monkeypatch.setattr(myers, 'MAX_COST', 8)
+    generator = random.Random(2)
+    for _ in range(100):
+        left = [generator.randint(0, 4) for _ in range(generator.randint(0, 120))]
+        right = [generator.randint(0, 4) for _ in range(generator.randint(0, 120))]
+        apply_opcodes(DIFF_ENGINES[engine](left, right), left, right)
+
+    monkeypatch.undo()
+    # five symbols, 8000 tokens took 12s before the search was bounded
+    left = [generator.randrange(5) for _ in range(8000)]
+    right = [generator.randrange(5) for _ in range(8000)]
+    started = time.perf_counter()
+    apply_opcodes(DIFF_ENGINES[engine](left, right), left, right)
+    assert time.perf_counter() - started < 3
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('engine', DIFF_ENGINES)
+def test_same_spans(engine):
+    cases = [
+        ([1, 2, 3, 4], [1, 2, 3, 4, 5, 6], ([], [(4, 6)])),
+        ([1, 2, 3, 4, 5, 6], [1, 2, 3, 4], ([(4, 6)], [])),
+        ([1, 2, 3, 4, 5], [1, 2, 9, 4, 5], ([(2, 3)], [(2, 3)])),
+        ([1, 2, 3, 4, 5], [7, 1, 2, 4, 5, 8, 9], ([(2, 3)], [(0, 1), (5, 7)])),
+    ]
+
+    for left, right, expected in cases:
+        assert get_text_dif_spans(left, right, DIFF_ENGINES[engine]) == expected
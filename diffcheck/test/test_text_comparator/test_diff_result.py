@@ -0,0 +1,42 @@
+import pytest
+
+from text_comparator.get_text_diff import get_text_deltas
+
+
+@pytest.mark.unit
+def test_unpacks_like_tuples(span_tokens):
+    left = span_tokens([1, 2, 3, 4, 5, 6, 7, 8, 9])
+    right = span_tokens([5, 6, 7, 8, 1, 2, 3, 4, 10])
+
+    result = get_text_deltas(left, right)
+    additions, subtractions, movements = result
+
+    assert not result.partial
+    assert [tuple(token) for token in additions] == [(16, 17, 10)]
+    assert [tuple(token) for token in subtractions] == [(16, 17, 9)]
+    assert additions[-1] == (16, 17, 10)
+    assert len(movements) == 1
+    assert list(movements[0][0]) == [8, 15, [5, 6, 7, 8]]
+    assert list(movements[0][1]) == [0, 7, [5, 6, 7, 8]]
+    assert movements[0][1].token_ids.tolist() == [5, 6, 7, 8]
+
+
+@pytest.mark.unit
+def test_empty():
+    additions, subtractions, movements = get_text_deltas([], [])
+
+    assert len(additions) == len(subtractions) == len(movements) == 0
+    with pytest.raises(IndexError):
+        additions[0]
+
+
+@pytest.mark.unit
+def test_additions_left_out_by_right_offset(span_tokens):
+    left = span_tokens([1, 2, 3, 10, 11, 12, 13])
+    right = span_tokens([10, 11, 12, 13, 20, 21, 22, 23, 1, 2, 3])
+
+    additions, subtractions, movements = get_text_deltas(left, right)
+
+    assert additions.token_ids.tolist() == [20, 21, 22, 23]
+    assert len(subtractions) == 0
+    assert len(movements) == 1
@@ -0,0 +1,35 @@
+import pytest
+
+from matcher.backends import get_matcher
+from text_comparator.fuzzy_moves import find_fuzzy_movements
+from text_comparator.get_text_diff import get_text_deltas
+
+
+@pytest.mark.unit
+def test_edited_move(span_tokens):
+    paragraph = list(range(100, 120))
+    edited = [*paragraph[:10], 999, *paragraph[11:]]
+    middle = list(range(200, 230))
+    left = span_tokens([*paragraph, *middle])
+    right = span_tokens([*middle, *edited])
+
+    result = get_text_deltas(left, right, get_matcher('reference'))
+    fuzzy = find_fuzzy_movements(left, right, result, min_length=8)
+
+    assert [tuple(token) for token in fuzzy.additions] == [(80, 81, 999)]
+    assert [tuple(token) for token in fuzzy.subtractions] == [(20, 21, 110)]
+    assert len(result.movements) == 2
+    assert len(fuzzy.movements) == 1
+    assert list(fuzzy.movements[0][0]) == [0, 39, paragraph]
+    assert list(fuzzy.movements[0][1]) == [60, 99, edited]
+    assert 0.5 <= fuzzy.movements.scores[0] < 1
+
+
+@pytest.mark.unit
+def test_unrelated_blocks(span_tokens):
+    left = span_tokens(list(range(100, 130)))
+    right = span_tokens(list(range(200, 230)))
+
+    result = get_text_deltas(left, right, get_matcher('reference'))
+
+    assert find_fuzzy_movements(left, right, result) is result
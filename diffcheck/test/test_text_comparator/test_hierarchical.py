@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from matcher.backends import get_matcher
+from matcher.budget import Budget
+from text_comparator.hierarchical import hierarchical_deltas, split_sentences
+
+
+@pytest.mark.unit
+def test_split_sentences():
+    text = 'One two. Three four! Five'
+
+    assert [text[start:end] for start, end in split_sentences(text, (0, len(text)))] == ['One two.', 'Three four!', 'Five']
+
+
+@pytest.mark.unit
+def test_moved_paragraph(word_tokenizer):
+    calls = []
+    left = 'a b c\nd e f\ng h i'
+    right = 'g h i\na b c\nd e f'
+
+    additions, subtractions, movements = hierarchical_deltas(word_tokenizer(calls), left, right, get_matcher('reference'))
+
+    assert len(additions) == len(subtractions) == 0
+    assert [tuple((tuple(movement[0]), tuple(movement[1]))) for movement in movements] == [
+        ((12, 17, [0, 1, 2]), (0, 5, [0, 1, 2]))
+    ]
+    assert calls == ['g h i']
+
+
+@pytest.mark.unit
+def test_changed_sentence(word_tokenizer):
+    calls = []
+    left = 'Same here.\nKeep this. Old words here. Keep that.'
+    right = 'Same here.\nKeep this. New words here. Keep that.'
+    tokenize = word_tokenizer(calls)
+
+    additions, subtractions, movements = hierarchical_deltas(tokenize, left, right, get_matcher('reference'))
+
+    assert [right[token[0]:token[1]] for token in additions] == ['New']
+    assert [left[token[0]:token[1]] for token in subtractions] == ['Old']
+    assert len(movements) == 0
+    assert calls == [left[11:], right[11:]]
+
+
+@pytest.mark.unit
+def test_budget_started_after_tokenizing(word_tokenizer):
+    word_tokenize = word_tokenizer()
+
+    def tokenize(text: str) -> list[tuple[int, int, int]]:
+        time.sleep(0.1)
+        return word_tokenize(text)
+
+    budget = Budget(seconds=0.05)
+    left = 'one two three four five six seven eight nine ten'
+    right = 'six seven eight nine ten new one two three four five'
+    result = hierarchical_deltas(tokenize, left, right, get_matcher('reference', budget=budget), budget=budget)
+
+    assert not budget.exhausted and len(result.movements)
@@ -0,0 +1,174 @@
+import random
+import re
+import time
+from typing import Callable
+
+import pytest
+
+from matcher.backends import get_matcher
+from matcher.budget import Budget
+from text_comparator.get_text_diff import get_text_deltas
+from text_comparator.incremental import IncrementalDiff, edit_window, splice_tokens
+
+
+WORDS = ['the', 'cat', 'sat', 'on', 'a', 'mat', 'and', 'dog', 'ran', 'far']
+SENTENCE_WORDS = WORDS + ['cat.', 'mat!', 'dog?', 'far."', '+', '+']
+
+
+def random_text(generator: random.Random) -> str:
+    return '\n'.join(
+        ' '.join(generator.choice(WORDS) for _ in range(generator.randint(0, 8)))
+        for _ in range(generator.randint(1, 6))
+    )
+
+
+def context_tokenizer() -> Callable[[str], list[tuple[int, int, int]]]:
+    """
+    Tokenizer like the rule engine's JOIN_ATTACHED: '+' joins the token before it across
+    whitespace, and the ID of a word depends on the word before it in its sentence
+    """
+    token_ids = {}
+
+    def tokenize(text: str) -> list[tuple[int, int, int]]:
+        tokens = []
+        previous = ''
+        for word in re.finditer(r'\S+', text):
+            if tokens and '\n' in text[tokens[-1][1]:word.start()]:
+                previous = ''
+            if word.group() == '+' and tokens:
+                start = tokens[-1][0]
+                tokens[-1] = tuple((start, word.end(), token_ids.setdefault(text[start:word.end()], len(token_ids))))
+            else:
+                tokens.append(tuple((word.start(), word.end(), token_ids.setdefault((previous, word.group()), len(token_ids)))))
+            previous = '' if re.search(r'[.!?]+["\')\]]*$', word.group()) else word.group()
+        return tokens
+
+    return tokenize
+
+
+def edit(generator: random.Random, text: str) -> str:
+    start = generator.randint(0, len(text))
+    end = generator.randint(start, min(len(text), start + 12))
+    insert = generator.choice(['', ' ', '\n', generator.choice(WORDS), ' ' + generator.choice(WORDS) + ' ', 'x\ny'])
+
+    return text[:start] + insert + text[end:]
+
+
+@pytest.mark.unit
+def test_splice_tokens(word_tokenizer):
+    tokenize = word_tokenizer()
+    generator = random.Random(0)
+    for _ in range(500):
+        old_text = random_text(generator)
+        new_text = edit(generator, old_text)
+        assert splice_tokens(tokenize, old_text, tokenize(old_text), new_text) == tokenize(new_text), (old_text, new_text)
+
+
+@pytest.mark.unit
+def test_splice_tokens_across_sentences(word_tokenizer):
+    tokenize = word_tokenizer()
+    generator = random.Random(2)
+    for _ in range(500):
+        old_text = ' '.join(generator.choice(SENTENCE_WORDS) for _ in range(generator.randint(0, 30)))
+        new_text = edit(generator, old_text)
+        for context in (0, 1, 2):
+            assert splice_tokens(tokenize, old_text, tokenize(old_text), new_text, context) == tokenize(new_text), (old_text, new_text)
+
+
+@pytest.mark.unit
+def test_splice_tokens_joined_across_space():
+    tokenize = context_tokenizer()
+    text = 'He left. + go'
+    assert tokenize(text)[1][:2] == (3, 10)
+    for old_text, new_text in ((text, 'He left. + went'), ('He left. go', text), (text, 'He left. go')):
+        for context in (0, 1):
+            assert splice_tokens(tokenize, old_text, tokenize(old_text), new_text, context) == tokenize(new_text), (old_text, new_text)
+
+    generator = random.Random(3)
+    for _ in range(500):
+        old_text = '\n'.join(
+            ' '.join(generator.choice(SENTENCE_WORDS) for _ in range(generator.randint(0, 12)))
+            for _ in range(generator.randint(1, 4))
+        )
+        new_text = edit(generator, old_text)
+        for context in (0, 1, 2):
+            assert splice_tokens(tokenize, old_text, tokenize(old_text), new_text, context) == tokenize(new_text), (old_text, new_text)
+
+
+@pytest.mark.unit
+def test_edit_window():
+    text = 'The cat sat. The dog ran! A mat? The end.\nNext line.'
+    start = text.index('dog')
+
+    assert text[slice(*edit_window(text, start, start + 3, 0))] == 'The dog ran! '
+    assert text[slice(*edit_window(text, start, start + 3, 1))] == 'The cat sat. The dog ran! A mat? '
+    assert text[slice(*edit_window(text, start, start + 3, 5))] == 'The cat sat. The dog ran! A mat? The end.'
+
+
+@pytest.mark.unit
+def test_same_as_full_comparison(as_tuples, word_tokenizer):
+    tokenize = word_tokenizer()
+    generator = random.Random(1)
+    for _ in range(50):
+        left_text = random_text(generator)
+        right_text = random_text(generator)
+        diff = IncrementalDiff(tokenize, left_text, 'reference')
+        for _ in range(10):
+            right_text = edit(generator, right_text)
+            expected = get_text_deltas(tokenize(left_text), tokenize(right_text), get_matcher('reference'))
+            assert as_tuples(diff.update(right_text)) == as_tuples(expected), (left_text, right_text)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('context', (0, 1))
+def test_independent_of_earlier_updates(context, as_tuples):
+    tokenize = context_tokenizer()
+    token_ids = {}
+
+    def tokenize_far(text: str) -> list[tuple[int, int, int]]:
+        """IDs depending on how many tokens come before in the text, context no window holds"""
+        return [tuple((start, end, token_ids.setdefault((index % 2, token_id), len(token_ids)))) for index, (start, end, token_id) in enumerate(tokenize(text))]
+
+    generator = random.Random(4)
+    for _ in range(50):
+        left_text = ' '.join(generator.choice(SENTENCE_WORDS) for _ in range(generator.randint(0, 30)))
+        right_text = left_text
+        diffs = [IncrementalDiff(tokenize, left_text, 'reference', context=context), IncrementalDiff(tokenize_far, left_text, 'reference', context=context)]
+        for _ in range(10):
+            right_text = edit(generator, right_text)
+            result = as_tuples(diffs[0].update(right_text))
+            expected = get_text_deltas(tokenize(left_text), tokenize(right_text), get_matcher('reference'))
+            assert result == as_tuples(expected), (left_text, right_text)
+
+            fresh = IncrementalDiff(tokenize_far, left_text, 'reference', context=context)
+            assert as_tuples(diffs[1].update(right_text)) == as_tuples(fresh.update(right_text)), (left_text, right_text)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('context', (-1, 0, 1))
+def test_first_update_spliced_from_left(context, word_tokenizer):
+    calls = []
+    tokenize = word_tokenizer(calls)
+    left_text = 'The cat sat. The dog ran! A mat? The end.\nNext line.'
+    diff = IncrementalDiff(tokenize, left_text, 'reference', context=context)
+    right_text = left_text.replace('dog', 'cat')
+
+    additions, subtractions, movements = diff.update(right_text)
+
+    assert calls[1:] == [right_text if context < 0 else right_text[slice(*edit_window(left_text, 17, 20, context))]]
+    assert diff.right_tokens == tokenize(right_text)
+    assert [tuple(addition) for addition in additions] == [(17, 20, tokenize('cat')[0][2])]
+    assert [tuple(subtraction) for subtraction in subtractions] == [(17, 20, tokenize('dog')[0][2])]
+
+
+@pytest.mark.unit
+def test_budget_started_after_splicing(word_tokenizer):
+    word_tokenize = word_tokenizer()
+
+    def tokenize(text: str) -> list[tuple[int, int, int]]:
+        time.sleep(0.1)
+        return word_tokenize(text)
+
+    diff = IncrementalDiff(tokenize, 'The cat sat. The dog ran.', 'reference')
+
+    assert not diff.update('The dog ran. The cat sat.', Budget(seconds=0.05)).partial
@@ -0,0 +1,86 @@
+"""
+The tokenizer rules as the per-token loop rule_engine.apply_rules replaced, frozen as the
+reference test_rule_engine.py and benchmark/bench_rule_engine.py compare it against.
+"""
+from spacy.tokens import Token
+
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+
+
+def are_neighbors(left, right) -> bool:
+    if isinstance(left, Token):
+        if isinstance(right, Token):
+            return left.idx + len(left.text) == right.idx
+        else:
+            return left.idx + len(left.text) == right[0]
+    elif isinstance(right, Token):
+        return left[1] == right.idx
+    else:
+        return left[1] == right[0]
+
+
+def join_tokens(left, right, deberta_tokens, pos='JOINED', dep=None) -> tuple:
+    return left[0], right.idx + len(right.text), left[2] + ''.join(deberta_token[2] for deberta_token in deberta_tokens), pos, dep
+
+
+def loop_rules(spacy_tokens, deberta_tokens, analyze) -> list[tuple]:
+    """The tokenizer rules as the per-token loop they replaced, with (start, end, pos, dep) tokens"""
+    spacy_to_deberta = ContextAwareTokenizer.map_spacy_to_deberta(spacy_tokens, deberta_tokens)
+    sub_token_analyses = analyze([
+        deberta_token[2]
+        for token, deberta_tokens in zip(spacy_tokens, spacy_to_deberta)
+        if token.pos_ in {'PRON'} and len(deberta_tokens) > 1
+        for deberta_token in deberta_tokens
+    ])
+
+    tokens = []
+    i = 0
+    while i < len(spacy_tokens):
+        token = spacy_tokens[i]
+        deberta_tokens = spacy_to_deberta[i]
+
+        if token.pos_ in {'PRON'} and len(deberta_tokens) > 1:
+            for deberta_token in deberta_tokens:
+                tokens.append((*deberta_token, *sub_token_analyses[deberta_token[2]]))
+            i += 1
+            continue
+
+        if token.pos_ == 'SPACE':
+            i += 1
+            continue
+
+        if token.text in {'_', '▁'}:
+            if len(tokens) > 0 and tokens[-1][3] not in {'PUNCT', 'SPACE'} and are_neighbors(tokens[-1], token):
+                if tokens[-1][3] == 'UNDERSCORE':
+                    tokens[-1] = join_tokens(tokens[-1], token, deberta_tokens, 'UNDERSCORE', None)
+                else:
+                    tokens[-1] = join_tokens(tokens[-1], token, deberta_tokens, 'NOUN', None)
+            else:
+                tokens.append((token.idx, token.idx + len(token.text), ''.join(deberta_token[2] for deberta_token in deberta_tokens), 'UNDERSCORE', None))
+
+            if i < len(spacy_tokens) - 1 and spacy_tokens[i + 1].pos_ not in {'PUNCT', 'SPACE'} and are_neighbors(tokens[-1], spacy_tokens[i + 1]):
+                tokens[-1] = join_tokens(tokens[-1], spacy_tokens[i + 1], spacy_to_deberta[i + 1], 'NOUN', None)
+                i += 1
+
+            i += 1
+            continue
+
+        if token.pos_ in {'AUX', 'PART'} and len(deberta_tokens) > 1:
+            tokens[-1] = join_tokens(tokens[-1], token, deberta_tokens)
+            i += 1
+            continue
+
+        if len(tokens) > 0 and tokens[-1][3] not in {'PUNCT', 'SPACE'} and token.pos_ not in {'PUNCT', 'SPACE'} and are_neighbors(tokens[-1], token):
+            token_type = token.pos_ if token.pos_ == tokens[-1][3] else 'JOINED'
+            tokens[-1] = join_tokens(tokens[-1], token, deberta_tokens, token_type, None)
+            i += 1
+            continue
+
+        tokens.append((token.idx, token.idx + len(token.text), ''.join(deberta_token[2] for deberta_token in deberta_tokens), token.pos_, token.dep_))
+        i += 1
+
+    return [
+        (token[0], token[1], token[3], token[4] or '')
+        for token in tokens
+        if token[3] not in {'UNDERSCORE', 'PUNCT', 'DET'} and (token[3] != 'CCONJ' or token[4] != 'cc')
+    ]
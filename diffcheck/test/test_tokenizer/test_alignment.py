@@ -0,0 +1,62 @@
+import random
+from collections import namedtuple
+
+import pytest
+
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+
+
+FakeToken = namedtuple('FakeToken', ['idx', 'text'])
+
+
+def quadratic_spacy_to_deberta(spacy_tokens, deberta_offsets) -> list[list]:
+    token_mapping = [[] for _ in range(len(spacy_tokens))]
+    for deberta_offset in deberta_offsets:
+        for i, token in enumerate(spacy_tokens):
+            if token.idx < deberta_offset[1] and token.idx + len(token.text) > deberta_offset[0]:
+                token_mapping[i].append(deberta_offset)
+                break
+    return token_mapping
+
+
+def quadratic_deberta_to_spacy(tokens, offsets) -> list[list]:
+    token_mapping = [[] for _ in range(len(offsets))]
+    for j, (deberta_start, deberta_end) in enumerate(offsets):
+        for token in tokens:
+            if token.idx < deberta_end and token.idx + len(token.text) > deberta_start:
+                token_mapping[j].append(token)
+                break
+    return token_mapping
+
+
+def random_streams(seed: int) -> tuple[list[FakeToken], list[tuple[int, int, str]]]:
+    generator = random.Random(seed)
+    spacy_tokens = []
+    position = 0
+    for _ in range(generator.randint(0, 30)):
+        position += generator.randint(0, 2)
+        length = generator.randint(1, 6)
+        spacy_tokens.append(FakeToken(position, 'x' * length))
+        position += length
+
+    deberta_offsets = []
+    position = 0
+    for _ in range(generator.randint(0, 40)):
+        position += generator.randint(0, 2)
+        length = generator.randint(0, 4)
+        deberta_offsets.append(tuple((position, position + length, 'x')))
+        position += length
+    if deberta_offsets and generator.random() < 0.3:
+        deberta_offsets.insert(generator.randrange(len(deberta_offsets)), tuple((0, 3, 'x')))
+
+    return spacy_tokens, deberta_offsets
+
+
+@pytest.mark.unit
+def test_same_mappings():
+    for seed in range(1000):
+        spacy_tokens, deberta_offsets = random_streams(seed)
+        offsets = [offset[:2] for offset in deberta_offsets]
+
+        assert ContextAwareTokenizer.map_spacy_to_deberta(spacy_tokens, deberta_offsets) == quadratic_spacy_to_deberta(spacy_tokens, deberta_offsets)
+        assert ContextAwareTokenizer.map_deberta_to_spacy(spacy_tokens, offsets) == quadratic_deberta_to_spacy(spacy_tokens, offsets)
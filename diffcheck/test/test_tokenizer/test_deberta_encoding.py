@@ -0,0 +1,30 @@
+import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+from tokenizer.deberta_tokenizer import DebertaTokenizer
+
+
+@pytest.fixture
+def backend_tokenizer() -> Tokenizer:
+    vocabulary = {'[UNK]': 0, '▁the': 1, '▁cat': 2, '▁sat': 3, 's': 4, '▁': 5, '.': 6}
+    tokenizer = Tokenizer(models.WordPiece(vocabulary, unk_token='[UNK]', continuing_subword_prefix=''))
+    tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+
+    return tokenizer
+
+
+@pytest.mark.unit
+def test_single_pass_matches_two_passes(backend_tokenizer):
+    text = 'the cats sat . the cat'
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend_tokenizer)
+
+    offsets = tokenizer(text, return_offsets_mapping=True, add_special_tokens=False)['offset_mapping']
+    tokens = tokenizer.tokenize(text)
+    two_passes = [
+        (start + 1 if tokens[i].startswith('▁') and end - start > 1 else start, end, tokens[i])
+        for i, (start, end) in enumerate(offsets)
+    ]
+
+    assert DebertaTokenizer.to_tokens(backend_tokenizer.encode(text, add_special_tokens=False)) == two_passes
+    assert [DebertaTokenizer.to_tokens(encoding) for encoding in backend_tokenizer.encode_batch([text, 'sat'], add_special_tokens=False)][0] == two_passes
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tokenizer import interning
+from tokenizer.interning import TokenIdCollision, TokenInterner
+
+
+@pytest.mark.unit
+def test_same_ids_in_another_process():
+    words = ['the', 'dragon', "can't", 'ünïcode']
+    output = subprocess.run(
+        [sys.executable, '-c', f'from tokenizer.interning import TokenInterner; print(TokenInterner().intern({words!r}))'],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={'PYTHONPATH': str(Path(interning.__file__).parent.parent), 'PYTHONHASHSEED': 'random'}
+    ).stdout
+
+    token_ids = TokenInterner().intern(words)
+    assert output.strip() == str(token_ids)
+    assert all(0 <= token_id < 1 << 63 for token_id in token_ids)
+    assert len(set(token_ids)) == len(words)
+
+
+@pytest.mark.unit
+def test_evicts_least_recent():
+    interner = TokenInterner(maxsize=2)
+    first, second = interner.intern(['first', 'second'])
+    interner.intern(['first'])
+    third, = interner.intern(['third'])
+
+    assert interner.text(first) == 'first'
+    assert interner.text(third) == 'third'
+    assert interner.text(second) == f'<{second}>'
+
+
+@pytest.mark.unit
+def test_export_update():
+    source = TokenInterner()
+    token_ids = source.intern(['moved', 'words'])
+    target = TokenInterner()
+
+    target.update(source.export(token_ids))
+
+    assert [target.text(token_id) for token_id in token_ids] == ['moved', 'words']
+
+
+@pytest.mark.unit
+def test_colliding_words_raise(monkeypatch):
+    monkeypatch.setattr(TokenInterner, 'token_id', staticmethod(lambda text: 7))
+    interner = TokenInterner()
+
+    assert interner.intern(['first', 'first']) == [7, 7]
+    with pytest.raises(TokenIdCollision):
+        interner.intern(['second'])
+    with pytest.raises(TokenIdCollision):
+        interner.update({7: 'second'})
+    assert interner.text(7) == 'first'
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+import spacy
+
+from text_comparator.get_text_diff import get_text_deltas
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+from tokenizer.deberta_tokenizer import MODEL_DIR, DebertaTokenizer
+from tokenizer.spacy_tokenizer import spacy_tokenizer
+
+
+FIXTURES = Path(__file__).parent.parent.parent / 'src'
+PAIRS = (('original.txt', 'revised.txt'), ('original2.txt', 'revised2.txt'))
+# share of tokens paragraph-granular tokenize may change, by tagging paragraph edges without their neighbours.
+# Not measured yet, the drift against the models is unknown, so the test using it is expected to be unverified
+PARAGRAPH_TOLERANCE = 0.01
+
+pytestmark = pytest.mark.skipif(
+    not spacy.util.is_package('en_core_web_sm') or not MODEL_DIR.exists(),
+    reason='needs the spaCy and DeBERTa models'
+)
+
+
+@pytest.fixture(scope='module')
+def deberta():
+    return DebertaTokenizer()
+
+
+@pytest.fixture(scope='module')
+def tokenizers(deberta):
+    return {profile: ContextAwareTokenizer(deberta, spacy_tokenizer(profile)) for profile in ('full', 'rules')}
+
+
+def words(tokenizer: ContextAwareTokenizer, left_text: str, right_text: str) -> tuple[list, list, list]:
+    """Added words, removed words and moved blocks of a comparison, as text"""
+    additions, subtractions, movements = get_text_deltas(tokenizer.tokenize(left_text), tokenizer.tokenize(right_text))
+
+    return tuple((
+        [tokenizer.to_text(token_id) for token_id in additions.token_ids],
+        [tokenizer.to_text(token_id) for token_id in subtractions.token_ids],
+        [[tokenizer.to_text(token_id) for token_id in movements.token_ids(index, 0)] for index in range(len(movements))]
+    ))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('pair', PAIRS)
+def test_rules_profile_same_as_full(pair, tokenizers):
+    left_text, right_text = ((FIXTURES / name).read_text(encoding='utf-8') for name in pair)
+
+    assert tokenizers['rules'].tokenize(left_text) == tokenizers['full'].tokenize(left_text)
+    assert words(tokenizers['rules'], left_text, right_text) == words(tokenizers['full'], left_text, right_text)
+
+
+@pytest.mark.unit
+@pytest.mark.xfail(strict=False, reason='PARAGRAPH_TOLERANCE is a guess, not a measured drift')
+@pytest.mark.parametrize('pair', PAIRS)
+def test_paragraphs_close_to_document(pair, tokenizers, record_property):
+    tokenizer = tokenizers['rules']
+    left_text, right_text = ((FIXTURES / name).read_text(encoding='utf-8') for name in pair)
+    document_tokens = tokenizer.tokenize(left_text)
+    document_words = words(tokenizer, left_text, right_text)
+
+    tokenizer.paragraph_granular = True
+    try:
+        paragraph_tokens = tokenizer.tokenize(left_text)
+        paragraph_words = words(tokenizer, left_text, right_text)
+    finally:
+        tokenizer.paragraph_granular = False
+
+    drift = len(set(document_tokens).symmetric_difference(paragraph_tokens)) / max(1, len(document_tokens))
+    record_property('paragraph_drift', drift)
+    assert drift <= PARAGRAPH_TOLERANCE
+    tolerance = PARAGRAPH_TOLERANCE * len(document_tokens)
+    for document_side, paragraph_side in zip(document_words[:2], paragraph_words[:2]):
+        assert abs(len(document_side) - len(paragraph_side)) <= tolerance
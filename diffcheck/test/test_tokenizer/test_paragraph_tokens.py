@@ -0,0 +1,97 @@
+import re
+
+import pytest
+
+from tokenizer.context_aware_tokenizer import PARAGRAPH, ContextAwareTokenizer
+from tokenizer.token_cache import TokenCache
+from tokenizer.token_stream import TokenStream
+
+
+TEXT = 'Barnabas\nBarnabas is an inventor.\n\n\nAppearance\nHe wears a cloak.\n'
+
+
+class FakeDeberta:
+    def encode(self, text: str) -> list:
+        return []
+
+    def encode_batch(self, texts: list[str]) -> list[list]:
+        return [[] for _ in texts]
+
+
+class FakeLanguage:
+    """Parses a text into itself, nlp.pipe batches are recorded"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, text: str) -> str:
+        return text
+
+    def pipe(self, texts, batch_size: int = 32, n_process: int = 1):
+        self.batches.append(tuple((batch_size, n_process)))
+        return iter(texts)
+
+
+class WordTokenizer(ContextAwareTokenizer):
+    """The rules replaced by one token per word, with the texts it parses recorded"""
+
+    def __init__(self):
+        super().__init__(FakeDeberta(), FakeLanguage())
+        self.parsed = []
+
+    def rule_tokens(self, text, doc, deberta_tokens):
+        self.parsed.append(text)
+        words = list(re.finditer(r'\w+', doc))
+        token_ids = self.interner.intern(word.group().lower() for word in words)
+        tokens = TokenStream.from_tokens([(word.start(), word.end(), token_id, 'NOUN', 'ROOT') for word, token_id in zip(words, token_ids)])
+        if self.token_cache is not None:
+            self.token_cache.put(text, tokens)
+
+        return tokens
+
+
+@pytest.mark.unit
+def test_paragraphs_cover_text():
+    for text in (TEXT, '\n\nleading', 'no break', ''):
+        assert ''.join(match.group() for match in PARAGRAPH.finditer(text)) == text
+
+
+@pytest.mark.unit
+def test_rebased_tokens_equal_whole_document():
+    tokenizer = WordTokenizer()
+    whole = tokenizer.tokenize(TEXT)
+
+    tokenizer.paragraph_granular = True
+    paragraph_tokens = tokenizer.tokenize(TEXT)
+    assert paragraph_tokens == whole
+    assert paragraph_tokens.pos_labels() == whole.pos_labels()
+
+
+@pytest.mark.unit
+def test_only_edited_paragraph_is_parsed():
+    tokenizer = WordTokenizer()
+    tokenizer.paragraph_granular = True
+    tokenizer.token_cache = TokenCache('v1')
+    tokenizer.tokenize(TEXT)
+    tokenizer.parsed.clear()
+
+    edited = TEXT.replace('a cloak', 'a hat')
+    tokens = tokenizer.tokenize(edited)
+
+    assert tokenizer.parsed == ['He wears a hat.\n']
+    tokenizer.paragraph_granular = False
+    assert tokens == tokenizer.tokenize(edited)
+    assert [tokenizer.to_text(token[2]) for token in tokens][-2:] == ['a', 'hat']
+
+
+@pytest.mark.unit
+def test_tokenize_many_in_order():
+    tokenizer = WordTokenizer()
+    tokenizer.token_cache = TokenCache('v1')
+    texts = [f'text {i} ' * (i % 3) for i in range(10)]
+    next(tokenizer.tokenize_many(texts[2:5]))
+    tokenizer.parsed.clear()
+
+    assert list(tokenizer.tokenize_many(iter(texts), batch_size=3, n_process=2)) == [tokenizer.tokenize(text) for text in texts]
+    assert texts[2] not in tokenizer.parsed
+    assert tokenizer.spacy_tokenizer.batches[-1] == (3, 2)
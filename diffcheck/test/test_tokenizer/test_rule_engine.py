@@ -0,0 +1,83 @@
+import random
+
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from test_tokenizer.rule_reference import loop_rules
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer
+from tokenizer.rule_engine import apply_rules
+from tokenizer.token_stream import DEP_LABELS, POS_LABELS, TokenStream
+
+
+WORDS = ['I', 'we', 'cat', 'sat', 'the', 'and', 'would', "n't", '_', '▁', '.', ',', 'mat', 'x']
+POS = ['PRON', 'AUX', 'PART', 'PUNCT', 'NOUN', 'VERB', 'DET', 'CCONJ', 'X', 'PROPN', 'SPACE']
+DEPS = ['cc', 'nsubj', 'ROOT', 'det', 'punct', 'aux', 'dobj']
+
+vocab = spacy.blank('en').vocab
+
+
+def random_doc(generator: random.Random) -> tuple[Doc, list[tuple[int, int, str]]]:
+    """Doc of random words and tags, each word split into one to three DeBERTa tokens"""
+    count = generator.randint(1, 30)
+    words = [generator.choice(WORDS) for _ in range(count)]
+    doc = Doc(
+        vocab,
+        words=words,
+        spaces=[generator.random() < 0.5 for _ in range(count)],
+        pos=[generator.choice(POS) for _ in range(count)],
+        deps=[generator.choice(DEPS) for _ in range(count)],
+        heads=[0] * count
+    )
+
+    deberta_tokens = []
+    for token in doc:
+        cuts = sorted(generator.sample(range(1, len(token.text)), min(len(token.text) - 1, generator.randint(0, 2))))
+        for start, end in zip([0, *cuts], [*cuts, len(token.text)]):
+            deberta_tokens.append((token.idx + start, token.idx + end, token.text[start:end]))
+
+    return doc, deberta_tokens
+
+
+def analyze(texts: list[str]) -> dict[str, tuple[str, str]]:
+    return {text: (POS[len(text) % len(POS)], DEPS[len(text) % len(DEPS)]) for text in texts}
+
+
+@pytest.mark.unit
+def test_matches_loop():
+    generator = random.Random(0)
+    compared = 0
+    for _ in range(2000):
+        doc, deberta_tokens = random_doc(generator)
+        try:
+            expected = loop_rules(doc, deberta_tokens, analyze)
+        except IndexError:
+            # an AUX or PART of several DeBERTa tokens first in the text had nothing to join
+            continue
+
+        starts, ends, pos, dep = apply_rules(doc, deberta_tokens, analyze)
+        assert list(zip(starts, ends, [POS_LABELS[code] for code in pos], [DEP_LABELS[code] for code in dep])) == expected
+        compared += 1
+
+    assert compared > 1000
+
+
+@pytest.mark.unit
+def test_leading_attached_token_is_kept():
+    doc = Doc(vocab, words=['would', 'go'], spaces=[True, False], pos=['AUX', 'VERB'], deps=['aux', 'ROOT'], heads=[1, 1])
+    starts, ends, pos, dep = apply_rules(doc, [(0, 3, 'wou'), (3, 5, 'ld'), (6, 8, 'go')], analyze)
+
+    assert list(zip(starts, ends)) == [(0, 5), (6, 8)]
+
+
+@pytest.mark.unit
+def test_rule_tokens_keep_columns():
+    doc = Doc(vocab, words=['The', 'cat', 'sat', '.'], pos=['DET', 'NOUN', 'VERB', 'PUNCT'], deps=['det', 'nsubj', 'ROOT', 'punct'], heads=[1, 2, 2, 2])
+    deberta_tokens = [tuple((token.idx, token.idx + len(token.text), token.text)) for token in doc]
+
+    tokens = ContextAwareTokenizer(None, None).rule_tokens(doc.text, doc, deberta_tokens)
+
+    assert isinstance(tokens, TokenStream)
+    assert [doc.text[start:end] for start, end, _ in tokens] == ['cat', 'sat']
+    assert tokens.pos_labels() == ['NOUN', 'VERB']
+    assert tokens.dep_labels() == ['nsubj', 'ROOT']
@@ -0,0 +1,31 @@
+import pytest
+import spacy
+
+from tokenizer import rule_engine
+from tokenizer.context_aware_tokenizer import ContextAwareTokenizer, TokenizerError
+from tokenizer.spacy_tokenizer import PROFILES, TOKENIZER_ATTRIBUTES, profile_components, provided_attributes
+
+
+class FakePipeline:
+    def __init__(self, pipe_names: list[str]):
+        self.pipe_names = pipe_names
+
+
+@pytest.mark.unit
+def test_rules_profile_components():
+    assert profile_components('rules') == ['tok2vec', 'tagger', 'parser', 'attribute_ruler']
+    assert 'ner' in profile_components('full')
+    with pytest.raises(ValueError):
+        profile_components('tiny')
+
+
+@pytest.mark.unit
+def test_rules_profile_covers_rule_attributes():
+    assert set(rule_engine.ATTRIBUTES) <= set(PROFILES['rules']) | set(TOKENIZER_ATTRIBUTES)
+    assert set(rule_engine.ATTRIBUTES) <= provided_attributes(FakePipeline(profile_components('rules')))
+
+
+@pytest.mark.unit
+def test_pipeline_missing_rule_attributes_is_rejected():
+    with pytest.raises(TokenizerError, match='dep, pos'):
+        ContextAwareTokenizer(None, spacy.blank('en'))
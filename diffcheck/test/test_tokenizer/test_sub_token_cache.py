@@ -0,0 +1,41 @@
+from collections import namedtuple
+
+import pytest
+
+from tokenizer.sub_token_cache import SubTokenCache
+
+
+FakeToken = namedtuple('FakeToken', ['pos_', 'dep_'])
+
+
+class FakeLanguage:
+    def __init__(self):
+        self.batches = []
+
+    def pipe(self, texts):
+        self.batches.append(list(texts))
+        return ([FakeToken(text.upper(), 'dep')] for text in texts)
+
+
+@pytest.mark.unit
+def test_batches_misses():
+    nlp = FakeLanguage()
+    cache = SubTokenCache(nlp)
+
+    assert cache.analyze(['▁i', "'m", '▁i']) == {'▁i': ('▁I', 'dep'), "'m": ("'M", 'dep')}
+    assert cache.analyze(["'m", '▁we']) == {"'m": ("'M", 'dep'), '▁we': ('▁WE', 'dep')}
+    assert nlp.batches == [['▁i', "'m"], ['▁we']]
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'size': 3, 'maxsize': 4096}
+
+
+@pytest.mark.unit
+def test_evicts_least_recent():
+    nlp = FakeLanguage()
+    cache = SubTokenCache(nlp, maxsize=2)
+
+    cache.analyze(['a', 'b'])
+    cache.analyze(['a'])
+    cache.analyze(['c'])
+    cache.analyze(['a', 'b'])
+
+    assert nlp.batches == [['a', 'b'], ['c'], ['b']]
@@ -0,0 +1,70 @@
+import pytest
+
+from tokenizer.token_cache import TokenCache, pack_tokens, unpack_tokens
+from tokenizer.token_stream import TokenStream
+
+
+TOKENS = TokenStream.from_tokens([(0, 3, 17, 'NOUN', 'nsubj'), (4, 9, 2**63 - 1, 'VERB', 'ROOT'), (10, 12, 0, 'JOINED', '')])
+
+
+@pytest.mark.unit
+def test_pack_round_trip():
+    tokens = unpack_tokens(pack_tokens(TOKENS))
+
+    assert tokens == TOKENS
+    assert tokens.pos_labels() == ['NOUN', 'VERB', 'JOINED']
+    assert tokens.dep_labels() == ['nsubj', 'ROOT', '']
+    assert unpack_tokens(pack_tokens(TokenStream.from_tokens([]))).tokens() == []
+
+
+@pytest.mark.unit
+def test_memory_hits_and_misses():
+    cache = TokenCache('v1')
+
+    assert cache.get('the cat') is None
+    cache.put('the cat', TOKENS)
+    assert cache.get('the cat') == TOKENS
+    assert cache.get('the dog') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+@pytest.mark.unit
+def test_key_includes_version():
+    assert TokenCache('v1').key('the cat') != TokenCache('v2').key('the cat')
+    assert TokenCache('v1').key('the cat') == TokenCache('v1').key('the cat')
+
+
+@pytest.mark.unit
+def test_evicts_least_recently_used_over_byte_budget():
+    cache = TokenCache('v1', max_bytes=2 * (len(pack_tokens(TOKENS)) + 128))
+    cache.put('a', TOKENS)
+    cache.put('b', TOKENS)
+    cache.get('a')
+    cache.put('c', TOKENS)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == TOKENS
+    assert cache.get('c') == TOKENS
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+@pytest.mark.unit
+def test_disk_tier_is_shared(tmp_path):
+    path = tmp_path / 'tokens.sqlite'
+    TokenCache('v1', path=path).put('the cat', TOKENS)
+
+    cache = TokenCache('v1', path=path)
+    assert cache.get('the cat') == TOKENS
+    assert cache.get('the cat') == TOKENS
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.stats()['hits'] == 1
+
+
+@pytest.mark.unit
+def test_disk_tier_drops_other_versions(tmp_path):
+    path = tmp_path / 'tokens.sqlite'
+    TokenCache('v1', path=path).put('the cat', TOKENS)
+
+    assert TokenCache('v2', path=path).get('the cat') is None
+    assert TokenCache('v1', path=path).get('the cat') is None
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+from matcher.backends import DEFAULT_BACKEND, get_matcher
+from text_comparator.fuzzy_moves import find_fuzzy_movements
+from text_comparator.get_text_diff import get_text_deltas
+from tokenizer.token_stream import TokenStream
+
+
+TOKENS = [(0, 3, 7, 'PRON', 'nsubj'), (4, 9, 8, 'VERB', 'ROOT'), (10, 12, 9, 'JOINED', None)]
+
+
+@pytest.mark.unit
+def test_from_tokens():
+    stream = TokenStream.from_tokens(TOKENS)
+
+    assert len(stream) == 3
+    assert stream[1] == (4, 9, 8)
+    assert stream[-1] == (10, 12, 9)
+    assert list(stream) == [token[:3] for token in TOKENS]
+    assert stream.pos_labels() == ['PRON', 'VERB', 'JOINED']
+    assert stream.dep_labels() == ['nsubj', 'ROOT', '']
+    assert TokenStream.from_tokens([]).tokens() == []
+    assert TokenStream.from_tokens([token[:3] for token in TOKENS]).pos_labels() == ['', '', '']
+
+
+@pytest.mark.unit
+def test_slices_share_columns():
+    stream = TokenStream.from_tokens(TOKENS)
+    tail = stream[1:]
+
+    assert tail == [(4, 9, 8), (10, 12, 9)]
+    assert tail.pos_labels() == ['VERB', 'JOINED']
+    stream.token_ids[2] = 99
+    assert tail[1] == (10, 12, 99)
+
+    starts, ends, token_ids, pos, dep = tail.numpy()
+    assert token_ids.tolist() == [8, 99]
+    assert np.shares_memory(token_ids, stream.numpy()[2])
+
+
+@pytest.mark.unit
+def test_slices_over_tokens():
+    tokens = [token[:3] for token in TOKENS]
+    stream = TokenStream.over_tokens(tokens)
+
+    assert stream[1:] == tokens[1:]
+    assert stream[::-1][0] == tokens[-1]
+    assert stream[1:][1:] == tokens[2:]
+
+
+@pytest.mark.unit
+def test_text_deltas_of_streams_match_lists():
+    generator = random.Random(0)
+    for _ in range(100):
+        left = [(i * 2, i * 2 + 1, generator.randint(0, 20)) for i in range(generator.randint(0, 60))]
+        right = [(i * 2, i * 2 + 1, generator.randint(0, 20)) for i in range(generator.randint(0, 60))]
+        expected = get_text_deltas(left, right, get_matcher(DEFAULT_BACKEND))
+        result = get_text_deltas(TokenStream.from_tokens(left), TokenStream.from_tokens(right), get_matcher(DEFAULT_BACKEND))
+
+        assert list(result.additions) == list(expected.additions)
+        assert list(result.subtractions) == list(expected.subtractions)
+        assert result.movements.rows() == expected.movements.rows()
+
+
+@pytest.mark.unit
+def test_fuzzy_movements_of_streams_match_lists():
+    generator = random.Random(1)
+    for _ in range(50):
+        left = [(i * 2, i * 2 + 1, generator.randint(0, 40)) for i in range(generator.randint(0, 80))]
+        # the halves swapped, with every seventh word edited
+        right = [(i * 2, i * 2 + 1, token[2] if i % 7 else 100 + i) for i, token in enumerate(left[40:] + left[:40])]
+        left_stream = TokenStream.from_tokens(left)
+        right_stream = TokenStream.from_tokens(right)
+        expected = find_fuzzy_movements(left, right, get_text_deltas(left, right), min_length=4)
+        result = find_fuzzy_movements(left_stream, right_stream, get_text_deltas(left_stream, right_stream), min_length=4)
+
+        assert list(result.additions) == list(expected.additions)
+        assert list(result.subtractions) == list(expected.subtractions)
+        assert result.movements.rows() == expected.movements.rows()
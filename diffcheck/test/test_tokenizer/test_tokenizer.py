@@ -11,7 +11,7 @@ def tokenize():
     spacy = spacy_tokenizer()
     tokenizer = ContextAwareTokenizer(deberta, spacy)
 
-    return lambda text: [tokenizer.deberta_tokenizer.tokenizer.convert_ids_to_tokens(token[2]) for token in tokenizer.tokenize(text)]
+    return lambda text: [tokenizer.to_text(token[2]) for token in tokenizer.tokenize(text)]
 
 
 @pytest.mark.unit